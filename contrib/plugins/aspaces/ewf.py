@@ -101,6 +101,10 @@ class EWFAddressSpace(standard.FileAddressSpace):
         self.fsize = self.fhandle.tell()
         self.fhandle.seek(0)
 
+    def _map_file(self):
+        ## Reads come from the decompressed libewf stream, not the container
+        return None
+
     def write(self, _addr, _buf):
         if not self._config.WRITE:
             return False
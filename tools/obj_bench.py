@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+#  -*- mode: python; -*-
+#
+# Volatility
+#
+# This file is part of Volatility.
+#
+# Volatility is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License Version 2 as
+# published by the Free Software Foundation.  You may not use, modify or
+# distribute this program under any other version of the GNU General
+# Public License.
+#
+# Volatility is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Volatility.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Measures how many objects per second volatility.obj can create for some
+common traversal patterns (struct member access, list walking, handle
+table arrays and invalid pointers), using a synthetic buffer address space
+so that the numbers reflect the object layer rather than disk or paging.
+
+Usage: python tools/obj_bench.py [-p profile] [-n count] [-r repeat]
+"""
+
+import os
+import sys
+import time
+import struct
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import volatility.conf as conf
+import volatility.registry as registry
+registry.PluginImporter()
+import volatility.obj as obj
+import volatility.commands as commands
+import volatility.addrspace as addrspace
+
+def build_space(profile_name, count):
+    """Returns a buffer address space holding a circular list of count
+    _EPROCESS structures, followed by a page of handle table entries"""
+    config = conf.ConfObject()
+    registry.register_global_options(config, commands.Command)
+    registry.register_global_options(config, addrspace.BaseAddressSpace)
+    config.parse_options(False)
+    config.PROFILE = profile_name
+
+    space = addrspace.BufferAddressSpace(config)
+    profile = space.profile
+    size = profile.get_obj_size("_EPROCESS")
+    links = profile.get_obj_offset("_EPROCESS", "ActiveProcessLinks")
+    pid = profile.get_obj_offset("_EPROCESS", "UniqueProcessId")
+    name = profile.get_obj_offset("_EPROCESS", "ImageFileName")
+    fmt = profile.native_types['address'][1]
+    ptr_size = struct.calcsize(fmt)
+
+    data = bytearray(size * count + 0x1000)
+    for i in range(count):
+        base = i * size
+        nxt = ((i + 1) % count) * size + links
+        prv = ((i - 1) % count) * size + links
+        data[base + links:base + links + 2 * ptr_size] = struct.pack(fmt, nxt) + struct.pack(fmt, prv)
+        data[base + pid:base + pid + ptr_size] = struct.pack(fmt, i * 4)
+        data[base + name:base + name + 8] = "proc{0:04d}".format(i % 10000)[:8]
+
+    # Handle table entries pointing nowhere, so dereferences fail
+    table = size * count
+    for i in range(0, 0x1000, ptr_size):
+        data[table + i:table + i + ptr_size] = struct.pack(fmt, 0x7fff0000 + i)
+
+    space.assign_buffer(str(data))
+    return space, table
+
+def walk_list(space, count):
+    """Follows ActiveProcessLinks through the list"""
+    head = obj.Object("_EPROCESS", offset = 0, vm = space)
+    seen = 0
+    for task in head.ActiveProcessLinks.list_of_type("_EPROCESS", "ActiveProcessLinks"):
+        seen += 1
+    return seen
+
+def read_members(space, count):
+    """Reads a row of pslist-style fields from each process"""
+    size = space.profile.get_obj_size("_EPROCESS")
+    for i in range(count):
+        task = obj.Object("_EPROCESS", offset = i * size, vm = space)
+        for value in (task.UniqueProcessId, task.InheritedFromUniqueProcessId, task.ImageFileName,
+                      task.CreateTime, task.ExitTime, task.ActiveThreads):
+            str(value)
+    return count * 7
+
+def handle_array(space, table):
+    """Iterates a page of handle table entries, dereferencing each"""
+    entries = obj.Object("Array", offset = table, vm = space, targetType = "_HANDLE_TABLE_ENTRY",
+                         count = 0x1000 / space.profile.get_obj_size("_HANDLE_TABLE_ENTRY"))
+    seen = 0
+    for entry in entries:
+        entry.Object.dereference_as("_OBJECT_HEADER")
+        seen += 2
+    return seen
+
+def none_objects(space, table, count):
+    """Dereferences invalid pointers, which produces NoneObjects"""
+    ptr = obj.Object("_HANDLE_TABLE_ENTRY", offset = table, vm = space).Object
+    for _ in range(count):
+        obj.Object("_EPROCESS", offset = 0x7fffffff, vm = space)
+        ptr.dereference_as("_OBJECT_HEADER")
+    return count * 2
+
+def bench(name, func, repeat, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        objects = func(*args)
+        elapsed = time.time() - start
+        if best is None or elapsed < best[1]:
+            best = (objects, elapsed)
+    objects, elapsed = best
+    print "{0:<16} {1:8d} objects {2:8.3f}s {3:12.0f} objects/s".format(name, objects, elapsed,
+                                                                      objects / max(elapsed, 1e-9))
+
+def main():
+    parser = OptionParser(usage = "%prog [-p profile] [-n count] [-r repeat]")
+    parser.add_option("-p", "--profile", default = "WinXPSP2x86",
+                      help = "Profile whose types are used")
+    parser.add_option("-n", "--count", type = "int", default = 5000,
+                      help = "Number of processes in the synthetic list")
+    parser.add_option("-r", "--repeat", type = "int", default = 3,
+                      help = "Runs of each pattern (the best is shown)")
+    (opts, _args) = parser.parse_args()
+
+    space, table = build_space(opts.profile, opts.count)
+
+    bench("list walk", walk_list, opts.repeat, space, opts.count)
+    bench("member reads", read_members, opts.repeat, space, opts.count)
+    bench("handle array", handle_array, opts.repeat, space, table)
+    bench("none objects", none_objects, opts.repeat, space, table, opts.count)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
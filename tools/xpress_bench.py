@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+#  -*- mode: python; -*-
+#
+# Volatility
+#
+# This file is part of Volatility.
+#
+# Volatility is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License Version 2 as
+# published by the Free Software Foundation.  You may not use, modify or
+# distribute this program under any other version of the GNU General
+# Public License.
+#
+# Volatility is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Volatility.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Benchmarks volatility.win32.xpress.xpress_decode against the original
+dictionary based decoder (and pyxpress, if it is installed) on synthetic
+compressed blocks shaped like hibernation file data.
+
+Usage: python tools/xpress_bench.py [-n blocks] [-s seed]
+"""
+
+import os
+import sys
+import time
+import random
+import struct
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import volatility.win32.xpress as xpress
+
+BLOCK_SIZE = 0x10000
+MAX_DISTANCE = 0x2000
+MIN_MATCH = 3
+
+def reference_decode(inputBuffer):
+    """The original decoder, which builds its output in a dict"""
+    outputBuffer = {}
+    outputIndex = 0
+    inputIndex = 0
+    indicatorBit = 0
+    nibbleIndex = 0
+
+    def recombine(outbuf):
+        return "".join(outbuf[k] for k in sorted(outbuf.keys()))
+
+    while inputIndex < len(inputBuffer):
+        if (indicatorBit == 0):
+            try:
+                indicator = struct.unpack("<L", inputBuffer[inputIndex:inputIndex + 4])[0]
+            except struct.error:
+                return recombine(outputBuffer)
+            inputIndex += 4
+            indicatorBit = 32
+
+        indicatorBit = indicatorBit - 1
+        if not (indicator & (1 << indicatorBit)):
+            try:
+                outputBuffer[outputIndex] = inputBuffer[inputIndex]
+            except IndexError:
+                return recombine(outputBuffer)
+            inputIndex += 1
+            outputIndex += 1
+        else:
+            try:
+                length = struct.unpack("<H", inputBuffer[inputIndex:inputIndex + 2])[0]
+            except struct.error:
+                return recombine(outputBuffer)
+            inputIndex += 2
+            offset = length / 8
+            length = length % 8
+            if length == 7:
+                if nibbleIndex == 0:
+                    nibbleIndex = inputIndex
+                    length = ord(inputBuffer[inputIndex]) % 16
+                    inputIndex += 1
+                else:
+                    length = ord(inputBuffer[nibbleIndex]) / 16
+                    nibbleIndex = 0
+                if length == 15:
+                    length = ord(inputBuffer[inputIndex])
+                    inputIndex += 1
+                    if length == 255:
+                        try:
+                            length = struct.unpack("<H", inputBuffer[inputIndex:inputIndex + 2])[0]
+                        except struct.error:
+                            return recombine(outputBuffer)
+                        inputIndex = inputIndex + 2
+                        length = length - (15 + 7)
+                    length = length + 15
+                length = length + 7
+            length = length + 3
+
+            while length != 0:
+                try:
+                    outputBuffer[outputIndex] = outputBuffer[outputIndex - offset - 1]
+                except KeyError:
+                    return recombine(outputBuffer)
+                outputIndex += 1
+                length -= 1
+
+    return recombine(outputBuffer)
+
+def xpress_encode(data):
+    """A simple greedy plain LZ77 encoder, good enough to produce test input"""
+    out = bytearray()
+    indicator_pos = None
+    indicator = 0
+    bits = 0
+    nibble_pos = None
+    table = {}
+    i = 0
+
+    while i < len(data):
+        if bits == 0:
+            if indicator_pos is not None:
+                out[indicator_pos:indicator_pos + 4] = struct.pack("<I", indicator)
+            indicator_pos = len(out)
+            out += "\0\0\0\0"
+            indicator = 0
+            bits = 32
+
+        match_len = 0
+        key = data[i:i + MIN_MATCH]
+        candidate = table.get(key)
+        if candidate is not None and i - candidate <= MAX_DISTANCE:
+            limit = min(len(data) - i, 0xFFFF + 3)
+            while match_len < limit and data[candidate + match_len] == data[i + match_len]:
+                match_len += 1
+        table[key] = i
+
+        bits -= 1
+        if match_len >= MIN_MATCH:
+            indicator |= 1 << bits
+            length = match_len - 3
+            offset = i - candidate - 1
+            if length < 7:
+                out += struct.pack("<H", (offset << 3) | length)
+            else:
+                out += struct.pack("<H", (offset << 3) | 7)
+                length -= 7
+                nibble = min(length, 15)
+                if nibble_pos is None:
+                    nibble_pos = len(out)
+                    out.append(nibble)
+                else:
+                    out[nibble_pos] |= nibble << 4
+                    nibble_pos = None
+                if length >= 15:
+                    length -= 15
+                    if length < 255:
+                        out.append(length)
+                    else:
+                        out.append(255)
+                        out += struct.pack("<H", match_len - 3)
+            i += match_len
+        else:
+            out.append(data[i])
+            i += 1
+
+    if indicator_pos is not None:
+        out[indicator_pos:indicator_pos + 4] = struct.pack("<I", indicator)
+    return str(out)
+
+def synthetic_block(rand):
+    """Returns a block of pages that looks roughly like memory: zero pages,
+    repeated structures, text and random data"""
+    pages = []
+    for _ in range(BLOCK_SIZE / 0x1000):
+        kind = rand.random()
+        if kind < 0.3:
+            pages.append("\0" * 0x1000)
+        elif kind < 0.6:
+            record = "".join(chr(rand.randrange(256)) for _ in range(rand.randrange(8, 64)))
+            pages.append((record * (0x1000 / len(record) + 1))[:0x1000])
+        elif kind < 0.8:
+            words = ["Volatility", "kernel32.dll", "\\Device\\HarddiskVolume1", "svchost.exe", "\0\0\0\0"]
+            text = "".join(rand.choice(words) for _ in range(0x400))
+            pages.append(text[:0x1000])
+        else:
+            pages.append("".join(chr(rand.randrange(256)) for _ in range(0x1000)))
+    return "".join(pages)
+
+def bench(name, decode, blocks):
+    start = time.time()
+    for compressed, _ in blocks:
+        decode(compressed)
+    elapsed = time.time() - start
+    print "{0:<20} {1:8.3f}s  {2:8.1f} MB/s".format(name, elapsed,
+            len(blocks) * BLOCK_SIZE / (1024.0 * 1024.0) / max(elapsed, 1e-9))
+    return elapsed
+
+def main():
+    parser = OptionParser(usage = "%prog [-n blocks] [-s seed]")
+    parser.add_option("-n", "--blocks", type = "int", default = 32,
+                      help = "Number of 64KB blocks to decode")
+    parser.add_option("-s", "--seed", type = "int", default = 0,
+                      help = "Random seed for the synthetic data")
+    (opts, _args) = parser.parse_args()
+
+    rand = random.Random(opts.seed)
+    blocks = []
+    for _ in range(opts.blocks):
+        data = synthetic_block(rand)
+        blocks.append((xpress_encode(data), data))
+
+    for compressed, data in blocks:
+        if reference_decode(compressed) != data:
+            print "Reference decoder does not round trip the synthetic data"
+            return 1
+        if xpress.xpress_decode(compressed) != data:
+            print "xpress_decode does not match the reference decoder"
+            return 1
+
+    ratio = sum(len(c) for c, _ in blocks) / float(len(blocks) * BLOCK_SIZE)
+    print "{0} blocks, compressed to {1:.1%}".format(len(blocks), ratio)
+
+    reference = bench("reference", reference_decode, blocks)
+    name = "pyxpress" if xpress.xpress_decode.__module__ != xpress.__name__ else "xpress_decode"
+    current = bench(name, xpress.xpress_decode, blocks)
+    print "Speed up: {0:.1f}x".format(reference / max(current, 1e-9))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
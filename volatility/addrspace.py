@@ -34,6 +34,7 @@
 
 #pylint: disable-msg=C0111
 
+import bisect
 import fractions
 import volatility.obj as obj
 import volatility.registry as registry
@@ -44,6 +45,20 @@ import volatility.debug as debug
 ## another module.
 PROFILES = {}
 
+def get_profile(profile_name):
+    """Returns the shared instance of the named profile, or None if there
+       is no such profile.
+
+       The profile is only instantiated (and so compiled) the first time
+       it is asked for; everything else gets the instance from PROFILES.
+    """
+    if profile_name not in PROFILES:
+        profs = registry.get_plugin_classes(obj.Profile)
+        if profile_name not in profs:
+            return None
+        PROFILES[profile_name] = profs[profile_name]()
+    return PROFILES[profile_name]
+
 class ASAssertionError(AssertionError):
 
     def __init__(self, *args, **kwargs):
@@ -89,15 +104,9 @@ class BaseAddressSpace(object):
 
     def _set_profile(self, profile_name):
         ## Load the required profile
-        if profile_name in PROFILES:
-            ret = PROFILES[profile_name]
-        else:
-            profs = registry.get_plugin_classes(obj.Profile)
-            if profile_name in profs:
-                ret = profs[profile_name]()
-                PROFILES[profile_name] = ret
-            else:
-                raise ASAssertionError, "Invalid profile " + profile_name + " selected"
+        ret = get_profile(profile_name)
+        if ret is None:
+            raise ASAssertionError, "Invalid profile " + profile_name + " selected"
         if not self.is_valid_profile(ret):
             raise ASAssertionError, "Incompatible profile " + profile_name + " selected"
         return ret
@@ -214,43 +223,67 @@ class AbstractDiscreteAllocMemory(BaseAddressSpace):
         if not self.alignment_gcd or not self.minimum_size:
             self.calculate_alloc_stats()
 
-        position = addr
-        remaining = length
-        buff = ""
         read = self.base.zread if pad else self.base.read
+        is_valid_address = self.base.is_valid_address
+        alignment_gcd = self.alignment_gcd
 
-        # For each allocation...
-        while remaining > 0:
-            # Determine whether we're within an alloc or not
-            alloc_remaining = (self.alignment_gcd - (addr % self.alignment_gcd))
-            # Try to jump out early
+        # Translate each allocation first, merging allocations that are
+        # physically contiguous into runs of [paddr, length, [alloc lengths]].
+        # Missing allocations have a paddr of None and are zero filled.
+        runs = []
+        position = addr
+        end = addr + length
+        while position < end:
+            datalen = min(end - position, alignment_gcd - (position % alignment_gcd))
             paddr = self.translate(position)
-            datalen = min(remaining, alloc_remaining)
             if paddr is None:
                 if not pad:
                     return None
-                buff += "\x00" * datalen
+            # This accounts for a special edge case
+            # when the address is valid in this address space
+            # but not in the underlying (base) address space.
+            # We have seen this happen with IA32/FileAddr
+            elif not is_valid_address(paddr):
+                if not pad:
+                    return obj.NoneObject("Could not read_chunks from addr " + hex(position) + " of size " + hex(datalen))
+                paddr = None
+
+            if runs and paddr is not None and runs[-1][0] is not None and runs[-1][0] + runs[-1][1] == paddr:
+                runs[-1][1] += datalen
+                runs[-1][2].append(datalen)
+            elif runs and paddr is None and runs[-1][0] is None:
+                runs[-1][1] += datalen
             else:
-                # This accounts for a special edge case
-                # when the address is valid in this address space
-                # but not in the underlying (base) address space.
-                # We have seen this happen with IA32/FileAddr
-
-                if self.base.is_valid_address(paddr):
-                    data = read(paddr, datalen)
-                else:
-                    data = None
+                runs.append([paddr, datalen, [datalen]])
+            position += datalen
 
-                if data is None:
+        buff = []
+        position = addr
+        for paddr, runlen, datalens in runs:
+            if paddr is None:
+                buff.append("\x00" * runlen)
+                position += runlen
+                continue
+
+            data = read(paddr, runlen)
+            if data and len(data) == runlen:
+                buff.append(data)
+                position += runlen
+                continue
+
+            # The base could not satisfy the whole run, so fall back
+            # to reading it one allocation at a time
+            for datalen in datalens:
+                data = read(paddr, datalen)
+                if not data:
                     if not pad:
                         return obj.NoneObject("Could not read_chunks from addr " + hex(position) + " of size " + hex(datalen))
                     data = "\x00" * datalen
-                buff += data
-            position += datalen
-            remaining -= datalen
-            assert (addr + length == position + remaining), "Address + length != position + remaining (" + hex(addr + length) + " != " + hex(position + remaining) + ") in " + self.base.__class__.__name__
-            assert (position - addr == len(buff)), "Position - address != len(buff) (" + str(position - addr) + " != " + str(len(buff)) + ") in " + self.base.__class__.__name__
-        return buff
+                buff.append(data)
+                paddr += datalen
+                position += datalen
+
+        return "".join(buff)
 
     def read(self, addr, length):
         '''
@@ -271,8 +304,18 @@ class AbstractRunBasedMemory(AbstractDiscreteAllocMemory):
 
        @var runs: Stores an ordered list of the segments or runs
                   A run is a tuple of (input/domain/virtual address, output/range/physical address, size of segment)
+
+       Subclasses populate self.runs directly, so translate keeps a sorted index
+       of the runs that is rebuilt whenever self.runs is replaced or grows.
     """
 
+    # The index is built on demand, these ensure it's rebuilt for
+    # subclasses that don't call our __init__
+    _run_index_key = None
+    _run_starts = None
+    _run_index = None
+    _last_run = None
+
     def __init__(self, base, config, *args, **kwargs):
         AbstractDiscreteAllocMemory.__init__(self, base, config, *args, **kwargs)
         self.runs = []
@@ -291,16 +334,34 @@ class AbstractRunBasedMemory(AbstractDiscreteAllocMemory):
 
         @param addr: a memory address
         """
-        for input_addr, output_addr, length in self.runs:
-            if addr >= input_addr and addr < input_addr + length:
-                return output_addr + (addr - input_addr)
-            # Since runs are in order, we can bail out early if we're
-            # looking for something before the start of the current one
-            if addr < input_addr:
-                return None
+        if self._run_index_key != (id(self.runs), len(self.runs)):
+            self._build_run_index()
+
+        # Reads tend to be sequential, so try the last run we hit first
+        last_run = self._last_run
+        if last_run and last_run[0] <= addr < last_run[2]:
+            return last_run[1] + (addr - last_run[0])
+
+        # Find the last run that starts at or before addr
+        index = bisect.bisect_right(self._run_starts, addr) - 1
+        if index < 0:
+            return None
+
+        input_addr, output_addr, length = self._run_index[index]
+        if addr < input_addr + length:
+            self._last_run = (input_addr, output_addr, input_addr + length)
+            return output_addr + (addr - input_addr)
 
         return None
 
+    def _build_run_index(self):
+        """Builds the sorted list of run start addresses used by translate"""
+        # Empty runs can never be hit, and would hide the run before them
+        self._run_index = sorted([(int(i), int(o), int(l)) for i, o, l in self.runs if l > 0])
+        self._run_starts = [i for i, _, _ in self._run_index]
+        self._run_index_key = (id(self.runs), len(self.runs))
+        self._last_run = None
+
     def get_available_allocs(self):
         """Get a list of accessible physical memory regions"""
         for input_addr, _, length in self.runs:
@@ -21,8 +21,6 @@
 import sys, textwrap
 import volatility.debug as debug
 import volatility.fmtspec as fmtspec
-import volatility.obj as obj
-import volatility.registry as registry
 import volatility.addrspace as addrspace
 
 class Command(object):
@@ -88,10 +86,12 @@ class Command(object):
     def execute(self):
         """ Executes the plugin command."""
         # Check we can support the plugins
-        profs = registry.get_plugin_classes(obj.Profile)
-        if self._config.PROFILE not in profs:
+        # The profile instance is shared with the address spaces, so
+        # it is only compiled once
+        profile = addrspace.get_profile(self._config.PROFILE)
+        if profile is None:
             debug.error("Invalid profile " + self._config.PROFILE + " selected")
-        if not self.is_valid_profile(profs[self._config.PROFILE]()):
+        if not self.is_valid_profile(profile):
             debug.error("This command does not support the profile " + self._config.PROFILE)
 
         # # Executing plugins is done in two stages - first we calculate
@@ -44,6 +44,11 @@ def setup(level = 0):
     for i in range(1, 9):
         logging.addLevelName(logging.DEBUG - i, "DEBUG" + str(i))
 
+def is_enabled(level = 1):
+    """Returns whether a debug message at this level would be logged,
+    for callers that want to avoid building expensive messages"""
+    return logging.getLogger().isEnabledFor(logging.DEBUG + 1 - level)
+
 def debug(msg, level = 1):
     """Logs a message at the DEBUG level"""
     log(msg, logging.DEBUG + 1 - level)
@@ -35,8 +35,9 @@ if __name__ == '__main__':
     sys.path.append("..")
 
 import cPickle as pickle # pickle implementation must match that in volatility.cache
-import struct, copy, operator
+import struct, copy, operator, types, collections
 import volatility.debug as debug
+import volatility.registry as registry
 import volatility.fmtspec as fmtspec
 import volatility.exceptions as exceptions
 import volatility.plugins.overlays.native_types as native_types
@@ -60,14 +61,27 @@ class NoneObject(object):
     """ A magical object which is like None but swallows bad
     dereferences, __getattribute__, iterators etc to return itself.
 
-    Instantiate with the reason for the error.
+    Instantiate with the reason for the error.  If reason_args are given,
+    reason is a format string which is only filled in if the reason is
+    actually looked at.
     """
-    def __init__(self, reason = '', strict = False):
-        debug.debug("None object instantiated: " + reason, 2)
-        self.reason = reason
+    __slots__ = ('_reason', '_reason_args', 'strict', 'bt')
+
+    def __init__(self, reason = '', strict = False, reason_args = ()):
+        self._reason = reason
+        self._reason_args = reason_args
         self.strict = strict
         if strict:
             self.bt = get_bt_string()
+        if debug.is_enabled(2):
+            debug.debug("None object instantiated: " + self.reason, 2)
+
+    @property
+    def reason(self):
+        if self._reason_args:
+            self._reason = self._reason.format(*self._reason_args)
+            self._reason_args = ()
+        return self._reason
 
     def __str__(self):
         ## If we are strict we blow up here
@@ -176,8 +190,8 @@ def Object(theType, offset, vm, name = None, **kwargs):
             return result
     except InvalidOffsetError:
         ## If we cant instantiate the object here, we just error out:
-        return NoneObject("Invalid Address 0x{0:08X}, instantiating {1}".format(offset, name),
-                          strict = vm.profile.strict)
+        return NoneObject("Invalid Address 0x{0:08X}, instantiating {1}", strict = vm.profile.strict,
+                          reason_args = (offset, name))
 
     ## If we get here we have no idea what the type is supposed to be?
     ## This is a serious error.
@@ -185,16 +199,27 @@ def Object(theType, offset, vm, name = None, **kwargs):
 
 class BaseObject(object):
 
+    # The core object types keep their attributes in slots, since plugins
+    # create huge numbers of them.  Objects can still be given any other 
+    # attribute, but their __dict__ is only created when that happens.
+    # _vol_snapshot is a shared [offset, data] copy of the enclosing struct, 
+    # see snapshot()
+    __slots__ = ('_vol_theType', '_vol_offset', '_vol_vm', '_vol_native_vm',
+                 '_vol_parent', '_vol_name', '_vol_snapshot', '__dict__')
+
     # We have **kwargs here, but it's unclear if it's a good idea
     # Benefit is objects will never fail with duff parameters
     # Downside is typos won't show up and be difficult to diagnose
     def __init__(self, theType, offset, vm, native_vm = None, parent = None, name = None, **kwargs):
-        self._vol_theType = theType
-        self._vol_offset = offset
-        self._vol_vm = vm
-        self._vol_native_vm = native_vm
-        self._vol_parent = parent
-        self._vol_name = name
+        # Skip any __setattr__ overrides, these are never struct members
+        setattr_ = object.__setattr__
+        setattr_(self, '_vol_theType', theType)
+        setattr_(self, '_vol_offset', offset)
+        setattr_(self, '_vol_vm', vm)
+        setattr_(self, '_vol_native_vm', native_vm)
+        setattr_(self, '_vol_parent', parent)
+        setattr_(self, '_vol_name', name)
+        setattr_(self, '_vol_snapshot', None)
 
         if not self.obj_vm.is_valid_address(self.obj_offset):
             raise InvalidOffsetError("Invalid Address 0x{0:08X}, instantiating {1}".format(offset, self.obj_name))
@@ -227,6 +252,47 @@ class BaseObject(object):
         """Sets the native_vm """
         self._vol_native_vm = native_vm
 
+    def snapshot(self):
+        """Reads the whole object in one go and returns self
+
+           Members of a struct (and their members, and array elements) 
+           accessed afterwards are decoded from the copy rather than each 
+           doing their own read from the address space.  Writing to any 
+           of them drops the copy.  If the object can't be read in full, 
+           nothing changes and members are read as usual.  Objects that
+           already have a copy covering them (for example members of a 
+           snapshotted struct) are not read again.
+        """
+        size = self.size()
+        snapshot = self._vol_snapshot
+        if snapshot is not None and snapshot[1] is not None and \
+                0 <= self.obj_offset - snapshot[0] <= len(snapshot[1]) - size:
+            return self
+
+        data = self.obj_vm.read(self.obj_offset, size)
+        if data and len(data) == size:
+            BaseObject.__setattr__(self, '_vol_snapshot', [self.obj_offset, data])
+        return self
+
+    def obj_read(self, offset, length):
+        """Reads data for the object, from the snapshot of its enclosing 
+        struct if there is one covering the range, otherwise from obj_vm"""
+        snapshot = self._vol_snapshot
+        if snapshot is not None and snapshot[1] is not None:
+            start = offset - snapshot[0]
+            if start >= 0 and start + length <= len(snapshot[1]):
+                return snapshot[1][start:start + length]
+        return self.obj_vm.read(offset, length)
+
+    def obj_zread(self, offset, length):
+        """Like obj_read, but zero-pads unreadable data like obj_vm.zread"""
+        snapshot = self._vol_snapshot
+        if snapshot is not None and snapshot[1] is not None:
+            start = offset - snapshot[0]
+            if start >= 0 and start + length <= len(snapshot[1]):
+                return snapshot[1][start:start + length]
+        return self.obj_vm.zread(offset, length)
+
     def rebase(self, offset):
         # If it's needed, we should be using the __getstate__ and __setstate__ functions
         raise DeprecationWarning("The rebase function has been deprecated and will be removed in future versions")
@@ -308,7 +374,7 @@ class BaseObject(object):
         if self.obj_native_vm.is_valid_address(self.v()):
             return Object(derefType, self.v(), self.obj_native_vm, parent = self, **kwargs)
         else:
-            return NoneObject("Invalid offset {0} for dereferencing {1} as {2}".format(self.v(), self.obj_name, derefType))
+            return NoneObject("Invalid offset {0} for dereferencing {1} as {2}", reason_args = (self.v(), self.obj_name, derefType))
 
     def cast(self, castString):
         return Object(castString, self.obj_offset, self.obj_vm)
@@ -351,7 +417,7 @@ class BaseObject(object):
             for arg in self.__init__.func_code.co_varnames:
                 if (arg not in result and
                     arg not in "self parent profile args".split()):
-                    result[arg] = self.__dict__[arg]
+                    result[arg] = _get_instance_attr(self, arg)
         except KeyError:
             debug.post_mortem()
             raise pickle.PicklingError("Object {0} at 0x{1:08x} cannot be cached because of missing attribute {2}".format(self.obj_name, self.obj_offset, arg))
@@ -370,7 +436,108 @@ class BaseObject(object):
         ## needed because __setstate__ can not return a new object,
         ## but must update the current object instead. I'm sure ikelos
         ## will object!!! I am open to suggestions ...
-        self.__dict__ = new_object.__dict__
+        for slot in _get_slot_names(type(new_object)):
+            try:
+                object.__setattr__(self, slot, object.__getattribute__(new_object, slot))
+            except AttributeError:
+                pass
+        if hasattr(new_object, '__dict__'):
+            self.__dict__ = new_object.__dict__
+
+## The slot names of each class, see _get_slot_names
+_slot_names = {}
+
+def _get_slot_names(cls):
+    """Returns the (mangled) names of all the slots of cls and its bases,
+    as a frozenset worked out once per class"""
+    try:
+        return _slot_names[cls]
+    except KeyError:
+        pass
+
+    names = []
+    for klass in cls.__mro__:
+        for name, value in klass.__dict__.items():
+            if isinstance(value, types.MemberDescriptorType):
+                names.append(name)
+    result = _slot_names[cls] = frozenset(names)
+    return result
+
+def _get_instance_attr(o, attr):
+    """Returns an attribute stored on the instance itself (in a slot or its
+    __dict__), raising KeyError if there isn't one"""
+    try:
+        return object.__getattribute__(o, '__dict__')[attr]
+    except (AttributeError, KeyError):
+        pass
+    if attr in _get_slot_names(type(o)):
+        try:
+            return object.__getattribute__(o, attr)
+        except AttributeError:
+            pass
+    raise KeyError(attr)
+
+class PageCache(object):
+    """A small cache of whole pages, for walking lists and trees
+
+       Create one per walk and pass each node through snapshot().  The
+       node is given a copy of the page(s) it sits on, so its members,
+       and the pointers to the next nodes, are decoded without going back
+       to the address space.  Nodes that share a page (which allocators
+       make common) only cost one read and one translation between them.
+
+       Nothing is cached if the address space may be written to.
+    """
+    page_size = 0x1000
+
+    def __init__(self, vm, max_pages = 64):
+        self.vm = vm
+        self.max_pages = max_pages
+        self.pages = collections.OrderedDict()
+        config = vm.get_config()
+        self.enabled = not getattr(config, 'WRITE', False)
+
+    def read_page(self, page):
+        """Returns the data of the page at address page, or None if it is
+        unreadable"""
+        try:
+            ## Move the page to the most recently used end
+            data = self.pages.pop(page)
+        except KeyError:
+            data = self.vm.read(page, self.page_size)
+            if data and len(data) != self.page_size:
+                data = None
+            if len(self.pages) >= self.max_pages:
+                self.pages.popitem(last = False)
+        self.pages[page] = data
+        return data
+
+    def snapshot(self, o):
+        """Snapshots the object o from the cached pages and returns it
+
+           Objects that are already snapshotted, live in another address
+           space or sit on an unreadable page are returned unchanged.
+        """
+        if not self.enabled or not isinstance(o, BaseObject) or \
+                o.obj_vm is not self.vm or o._vol_snapshot is not None:
+            return o
+
+        start = o.obj_offset - (o.obj_offset % self.page_size)
+        end = o.obj_offset + max(o.size(), 1)
+        if end - start > self.max_pages * self.page_size:
+            return o
+
+        data = []
+        page = start
+        while page < end:
+            page_data = self.read_page(page)
+            if page_data is None:
+                return o
+            data.append(page_data)
+            page += self.page_size
+
+        BaseObject.__setattr__(o, '_vol_snapshot', [start, "".join(data)])
+        return o
 
 def CreateMixIn(mixin):
     def make_method(name):
@@ -399,6 +566,8 @@ def CreateMixIn(mixin):
 
 class NumericProxyMixIn(object):
     """ This MixIn implements the numeric protocol """
+    __slots__ = ()
+
     _specials = [
         ## Number protocols
         '__add__', '__sub__', '__mul__', '__floordiv__', '__mod__', '__divmod__',
@@ -420,14 +589,20 @@ class NumericProxyMixIn(object):
 CreateMixIn(NumericProxyMixIn)
 
 class NativeType(BaseObject, NumericProxyMixIn):
+    __slots__ = ('format_string',)
+
     def __init__(self, theType, offset, vm, format_string = None, **kwargs):
         BaseObject.__init__(self, theType, offset, vm, **kwargs)
         NumericProxyMixIn.__init__(self)
-        self.format_string = format_string
+        object.__setattr__(self, 'format_string', format_string)
 
     def write(self, data):
         """Writes the data back into the address space"""
         output = struct.pack(self.format_string, data)
+        if self._vol_snapshot is not None:
+            # The snapshot is shared with the struct and its other members,
+            # so this drops it for all of them
+            self._vol_snapshot[1] = None
         return self.obj_vm.write(self.obj_offset, output)
 
     def proxied(self, attr):
@@ -437,9 +612,9 @@ class NativeType(BaseObject, NumericProxyMixIn):
         return struct.calcsize(self.format_string)
 
     def v(self):
-        data = self.obj_vm.read(self.obj_offset, self.size())
+        data = self.obj_read(self.obj_offset, self.size())
         if not data:
-            return NoneObject("Unable to read {0} bytes from {1}".format(self.size(), self.obj_offset))
+            return NoneObject("Unable to read {0} bytes from {1}", reason_args = (self.size(), self.obj_offset))
 
         (val,) = struct.unpack(self.format_string, data)
 
@@ -463,6 +638,8 @@ class NativeType(BaseObject, NumericProxyMixIn):
 
 class BitField(NativeType):
     """ A class splitting an integer into a bunch of bit. """
+    __slots__ = ('start_bit', 'end_bit', 'native_type')
+
     def __init__(self, theType, offset, vm, start_bit = 0, end_bit = 32, native_type = None, **kwargs):
         # Defaults to profile-endian address, but can be overridden by native_type
         format_string = vm.profile.native_types.get(native_type, vm.profile.native_types['address'])[1]
@@ -481,6 +658,8 @@ class BitField(NativeType):
 
 
 class Pointer(NativeType):
+    __slots__ = ('target',)
+
     def __init__(self, theType, offset, vm, target = None, **kwargs):
         # Default to profile-endian address
         # We don't allow native_type overriding for pointers since we can't dereference invalid pointers anyway
@@ -490,9 +669,9 @@ class Pointer(NativeType):
         NativeType.__init__(self, theType, offset, vm, format_string = vm.profile.native_types['address'][1], **kwargs)
 
         if theType:
-            self.target = Curry(Object, theType)
+            object.__setattr__(self, 'target', Curry(Object, theType))
         else:
-            self.target = target
+            object.__setattr__(self, 'target', target)
 
     def __getstate__(self):
         ## This one is too complicated to pickle right now
@@ -513,7 +692,7 @@ class Pointer(NativeType):
                                  name = self.obj_name)
             return result
         else:
-            return NoneObject("Pointer {0} invalid".format(self.obj_name), self.obj_vm.profile.strict)
+            return NoneObject("Pointer {0} invalid", self.obj_vm.profile.strict, reason_args = (self.obj_name,))
 
     def cdecl(self):
         return "Pointer {0}".format(self.v())
@@ -543,6 +722,8 @@ class Pointer(NativeType):
         return result.m(memname)
 
 class Void(NativeType):
+    __slots__ = ()
+
     def __init__(self, theType, offset, vm, **kwargs):
         # Default to profile-endian unsigned long
         # This should never need to be overridden, but can be by changing the 'Void' value in a profile's object_classes
@@ -563,6 +744,9 @@ class Void(NativeType):
 
 class Array(BaseObject):
     """ An array of objects of the same size """
+
+    # Arrays up to this size are read in one go when iterated or decoded
+    bulk_read_limit = 0x100000
     def __init__(self, theType, offset, vm, parent = None,
                  count = 1, targetType = None, target = None, name = None, **kwargs):
         ## Instantiate the first object on the offset:
@@ -593,9 +777,34 @@ class Array(BaseObject):
     def size(self):
         return self.count * self.current.size()
 
+    def _bulk_snapshot(self):
+        """Snapshots the whole array, unless it's too big or already done"""
+        if self._vol_snapshot is None and self.size() <= self.bulk_read_limit:
+            self.snapshot()
+
+    def values(self):
+        """Returns a list of the values of all the elements
+
+           Arrays of plain native types and pointers are decoded with a
+           single read and unpack.  Otherwise (or if the array can't be 
+           read in one go) this is the v() of each element, so unreadable
+           elements are NoneObjects.
+        """
+        current = self.current
+        if type(current) in (NativeType, Pointer, Void) and self.size() <= self.bulk_read_limit:
+            fmt = current.format_string
+            data = self.obj_read(self.original_offset, self.size())
+            if data and len(data) == self.size():
+                # Ensure integers become longs, as NativeType.v does
+                return [long(v) if isinstance(v, int) else v
+                        for v in struct.unpack(fmt[0] + fmt[1:] * self.count, data)]
+
+        return [self[position].v() for position in range(self.count)]
+
     def __iter__(self):
         ## This method is better than the __iter__/next method as it
         ## is reentrant
+        self._bulk_snapshot()
         for position in range(0, self.count):
 
             ## We don't want to stop on a NoneObject.  Its
@@ -647,16 +856,27 @@ class Array(BaseObject):
         ## Check if the offset is valid
         offset = self.original_offset + pos * self.current.size()
 
-        if self.obj_vm.is_valid_address(offset):
+        # Anything inside a snapshot has already been read successfully
+        snapshot = self._vol_snapshot
+        if snapshot is not None and snapshot[1] is not None and \
+                0 <= offset - snapshot[0] < len(snapshot[1]):
+            valid = True
+        else:
+            valid = self.obj_vm.is_valid_address(offset)
+
+        if valid:
             # Ensure both the true VM and offsetlayer are copied across
-            return self.target(offset = offset,
-                               vm = self.obj_vm,
-                               native_vm = self.obj_native_vm,
-                               parent = self,
-                               name = "{0} {1}".format(self.obj_name, pos))
+            result = self.target(offset = offset,
+                                 vm = self.obj_vm,
+                                 native_vm = self.obj_native_vm,
+                                 parent = self,
+                                 name = "{0} {1}".format(self.obj_name, pos))
+            if self._vol_snapshot is not None and isinstance(result, BaseObject):
+                BaseObject.__setattr__(result, '_vol_snapshot', self._vol_snapshot)
+            return result
         else:
-            return NoneObject("Array {0} invalid member {1}".format(self.obj_name, pos),
-                              self.obj_vm.profile.strict)
+            return NoneObject("Array {0} invalid member {1}", self.obj_vm.profile.strict,
+                              reason_args = (self.obj_name, pos))
 
     def __setitem__(self, pos, value):
         ## Get the item, then try writing to it
@@ -666,6 +886,8 @@ class Array(BaseObject):
 
 class CType(BaseObject):
     """ A CType is an object which represents a c struct """
+    __slots__ = ('members', 'struct_size', '__initialized')
+
     def __init__(self, theType, offset, vm, name = None, members = None, struct_size = 0, **kwargs):
         """ This must be instantiated with a dict of members. The keys
         are the offsets, the values are Curried Object classes that
@@ -676,10 +898,10 @@ class CType(BaseObject):
             debug.debug("No members specified for CType {0} named {1}".format(theType, name), level = 2)
             members = {}
 
-        self.members = members
-        self.struct_size = struct_size
+        object.__setattr__(self, 'members', members)
+        object.__setattr__(self, 'struct_size', struct_size)
         BaseObject.__init__(self, theType, offset, vm, name = name, **kwargs)
-        self.__initialized = True
+        object.__setattr__(self, '_CType__initialized', True)
 
     def size(self):
         return self.struct_size
@@ -703,10 +925,10 @@ class CType(BaseObject):
         return long(self.obj_offset)
 
     def m(self, attr):
-        if attr in self.members:
+        element = self.members.get(attr)
+        if element is not None:
             # Allow the element to be a callable rather than a list - this is
             # useful for aliasing member names
-            element = self.members[attr]
             if callable(element):
                 return element(self)
 
@@ -724,13 +946,17 @@ class CType(BaseObject):
             offset = int(offset(self))
         else:
             ## Otherwise its relative to the start of our struct
-            offset = int(offset) + int(self.obj_offset)
+            offset = int(offset) + int(self._vol_offset)
 
         try:
-            result = cls(offset = offset, vm = self.obj_vm, parent = self, name = attr, native_vm = self.obj_native_vm)
+            result = cls(offset = offset, vm = self._vol_vm, parent = self, name = attr,
+                         native_vm = self._vol_native_vm or self._vol_vm)
         except InvalidOffsetError, e:
             return NoneObject(str(e))
 
+        if self._vol_snapshot is not None and isinstance(result, BaseObject):
+            BaseObject.__setattr__(result, '_vol_snapshot', self._vol_snapshot)
+
         return result
 
     def __getattr__(self, attr):
@@ -739,9 +965,15 @@ class CType(BaseObject):
     def __setattr__(self, attr, value):
         """Change underlying members"""
         # Special magic to allow initialization
-        if not self.__dict__.has_key('_CType__initialized'):  # this test allows attributes to be set in the __init__ method
+        try:
+            # Use object's lookup, so an unset slot doesn't end up in self.m()
+            initialized = object.__getattribute__(self, '_CType__initialized')
+        except AttributeError:
+            initialized = False
+
+        if not initialized:  # this test allows attributes to be set in the __init__ method
             return BaseObject.__setattr__(self, attr, value)
-        elif self.__dict__.has_key(attr):       # any normal attributes are handled normally
+        elif attr in _get_slot_names(type(self)) or attr in self.__dict__:       # any normal attributes are handled normally
             return BaseObject.__setattr__(self, attr, value)
         else:
             obj = self.m(attr)
@@ -844,6 +1076,9 @@ class Profile(object):
         # Set up the "input" data
         self.vtypes = {}
 
+        # Sizes and members of compiled types, filled in as they're asked for
+        self._layouts = {}
+
         # Carry out the inital setup
         self.reset()
 
@@ -889,7 +1124,12 @@ class Profile(object):
         if not vtype_module:
             debug.warning("No vtypes specified for this profile")
         else:
-            module = sys.modules.get(vtype_module, None)
+            # The vtype modules are only imported when a profile needs them
+            try:
+                module = registry.load_module(vtype_module)
+            except ImportError, e:
+                debug.warning("Unable to load vtypes from {0}: {1}".format(vtype_module, e))
+                module = None
 
             # Try to locate the _types dictionary
             for i in dir(module):
@@ -938,6 +1178,7 @@ class Profile(object):
 
         # Load the native types
         self.types = {}
+        self._layouts = {}
         for nt, value in self.native_types.items():
             if type(value) == list:
                 self.types[nt] = Curry(NativeType, nt, format_string = value[1])
@@ -994,22 +1235,41 @@ class Profile(object):
         """ Returns a simple check of whether the type is in the profile """
         return theType in self.types
 
+    def _get_layout(self, name):
+        """ Returns the layout table entry for a compiled type
+
+            The entry holds a dummy instance of the type (whose members
+            dict maps each member to its offset and type), along with the 
+            size and obj_has_member answers once they've been asked for.
+            The dummy object is only built the first time a type is looked 
+            up, and the whole table is thrown away when the profile is 
+            recompiled.
+        """
+        layout = self._layouts.get(name)
+        if layout is None:
+            layout = self._layouts[name] = {'dummy': self._get_dummy_obj(name), 'has_member': {}}
+        return layout
+
     def get_obj_offset(self, name, member):
         """ Returns a members offset within the struct """
-        tmp = self._get_dummy_obj(name)
-        offset, _cls = tmp.members[member]
+        offset, _cls = self._get_layout(name)['dummy'].members[member]
 
         return offset
 
     def get_obj_size(self, name):
         """Returns the size of a struct"""
-        tmp = self._get_dummy_obj(name)
-        return tmp.size()
+        layout = self._get_layout(name)
+        if 'size' not in layout:
+            layout['size'] = layout['dummy'].size()
+        return layout['size']
 
     def obj_has_member(self, name, member):
         """Returns whether an object has a certain member"""
-        tmp = self._get_dummy_obj(name)
-        return hasattr(tmp, member)
+        layout = self._get_layout(name)
+        has_member = layout['has_member']
+        if member not in has_member:
+            has_member[member] = hasattr(layout['dummy'], member)
+        return has_member[member]
 
     def merge_overlay(self, overlay):
         """Applies an overlay to the profile's vtypes"""
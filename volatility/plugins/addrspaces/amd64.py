@@ -34,6 +34,9 @@ page_shift = 12
 ptrs_per_pae_pgd = 512
 ptrs_per_pae_pte = 512
 
+long_long_struct = struct.Struct('<Q')
+table_struct = struct.Struct('<%dQ' % ptrs_per_pae_pgd)
+
 class AMD64PagedMemory(paged.AbstractWritablePagedMemory):
     """ Standard AMD 64-bit address space.
    
@@ -113,7 +116,7 @@ class AMD64PagedMemory(paged.AbstractWritablePagedMemory):
         "Bits 2:0 are 0" [Intel]
         '''
         pml4e_paddr = (self.dtb & 0xffffffffff000) | ((vaddr & 0xff8000000000) >> 36)
-        return self.read_long_long_phys(pml4e_paddr)
+        return self.read_long_long_phys(pml4e_paddr, cached = True)
 
     def get_pdpi(self, vaddr, pml4e):
         '''
@@ -126,7 +129,7 @@ class AMD64PagedMemory(paged.AbstractWritablePagedMemory):
         "Bits 2:0 are all 0" [Intel]
         '''
         pdpte_paddr = (pml4e & 0xffffffffff000) | ((vaddr & 0x7FC0000000) >> 27)
-        return self.read_long_long_phys(pdpte_paddr)
+        return self.read_long_long_phys(pdpte_paddr, cached = True)
 
     def get_1GB_paddr(self, vaddr, pdpte):
         '''
@@ -146,7 +149,7 @@ class AMD64PagedMemory(paged.AbstractWritablePagedMemory):
 
     def get_pgd(self, vaddr, pdpe):
         pgd_entry = self.pdba_base(pdpe) + self.pde_index(vaddr) * entry_size
-        return self.read_long_long_phys(pgd_entry)
+        return self.read_long_long_phys(pgd_entry, cached = True)
 
     def pte_index(self, vaddr):
         return (vaddr >> page_shift) & (ptrs_per_pde - 1)
@@ -164,12 +167,13 @@ class AMD64PagedMemory(paged.AbstractWritablePagedMemory):
     def get_paddr(self, vaddr, pte):
         return self.pte_pfn(pte) | (vaddr & ((1 << page_shift) - 1))
 
-    def vtop(self, vaddr):
+    def page_walk(self, vaddr):
         '''
         This method translates an address in the virtual
-        address space to its associated physical address.
-        Invalid entries should be handled with operating
-        system abstractions.
+        address space to its associated physical address,
+        returning it along with the size of the page it
+        lies in. Invalid entries should be handled with
+        operating system abstractions.
         '''
         vaddr = long(vaddr)
         retVal = None
@@ -182,34 +186,35 @@ class AMD64PagedMemory(paged.AbstractWritablePagedMemory):
             return retVal
 
         if self.page_size_flag(pdpe):
-            return self.get_1GB_paddr(vaddr, pdpe)
+            return (self.get_1GB_paddr(vaddr, pdpe), 0x40000000)
 
         pgd = self.get_pgd(vaddr, pdpe)
         if self.entry_present(pgd):
             if self.page_size_flag(pgd):
-                retVal = self.get_2MB_paddr(vaddr, pgd)
+                retVal = (self.get_2MB_paddr(vaddr, pgd), 0x200000)
             else:
                 pte = self.get_pte(vaddr, pgd)
                 if self.entry_present(pte):
-                    retVal = self.get_paddr(vaddr, pte)
+                    retVal = (self.get_paddr(vaddr, pte), 0x1000)
         return retVal
 
-    def read_long_long_phys(self, addr):
+    def read_long_long_phys(self, addr, cached = False):
         '''
         This method returns a 64-bit little endian
         unsigned integer from the specified address in the
         physical address space. If the address cannot be accessed,
-        then the method returns None.
+        then the method returns None. If cached is True the
+        page holding the entry is kept in the table cache.
 
         This code was derived directly from legacyintel.py
         '''
         try:
-            string = self.base.read(addr, 8)
+            value = self.unpack_phys(long_long_struct, addr, cached)
         except IOError:
-            string = None
-        if not string:
+            value = None
+        if not value:
             return obj.NoneObject("Unable to read_long_long_phys at " + hex(addr))
-        (longlongval,) = struct.unpack('<Q', string)
+        (longlongval,) = value
         return longlongval
 
     def get_available_pages(self):
@@ -218,38 +223,38 @@ class AMD64PagedMemory(paged.AbstractWritablePagedMemory):
         available within the address space. The entries in
         are composed of the virtual address of the page
         and the size of the particular page (address, size).
-        It walks the 0x1000/0x8 (0x200) entries in each Page Map, 
-        Page Directory, and Page Table to determine which pages
-        are accessible.
+        It reads each Page Map, Page Directory Pointer table, Page
+        Directory and Page Table as a whole and walks its 0x1000/0x8
+        (0x200) entries to determine which pages are accessible.
         '''
-        
-        for pml4e in range(0, 0x200):
-            vaddr = pml4e << 39
-            pml4e_value = self.get_pml4e(vaddr)
-            if not self.entry_present(pml4e_value):
+        entry_present = self.entry_present
+        read_table = self.read_table
+        read_entry = self.read_long_long_phys
+
+        pml4_table = read_table(self.dtb & 0xffffffffff000, table_struct, entry_size, read_entry)
+        for pml4e, pml4e_value in enumerate(pml4_table):
+            if not pml4e_value or not entry_present(pml4e_value):
                 continue
-            for pdpte in range(0, 0x200):
-                vaddr = (pml4e << 39) | (pdpte << 30)
-                pdpte_value = self.get_pdpi(vaddr, pml4e_value)
-                if not self.entry_present(pdpte_value):
+            pdpt_table = read_table(pml4e_value & 0xffffffffff000, table_struct, entry_size, read_entry)
+            for pdpte, pdpte_value in enumerate(pdpt_table):
+                if not pdpte_value or not entry_present(pdpte_value):
                     continue
+                vaddr = (pml4e << 39) | (pdpte << 30)
                 if self.page_size_flag(pdpte_value):
                     yield (vaddr, 0x40000000)
                     continue
 
-                pgd_curr = self.pdba_base(pdpte_value)
-                for j in range(0, ptrs_per_pae_pgd):
+                pgd_table = read_table(self.pdba_base(pdpte_value), table_struct, entry_size, read_entry)
+                for j, entry in enumerate(pgd_table):
+                    if not entry or not entry_present(entry):
+                        continue
                     soffset = vaddr + (j * ptrs_per_pae_pgd * ptrs_per_pae_pte * 8)
-                    entry = self.read_long_long_phys(pgd_curr)
-                    pgd_curr = pgd_curr + 8
-                    if self.entry_present(entry) and self.page_size_flag(entry):
+                    if self.page_size_flag(entry):
                         yield (soffset, 0x200000)
-                    elif self.entry_present(entry):
-                        pte_curr = entry & 0xFFFFFFFFFF000
-                        for k in range(0, ptrs_per_pae_pte):
-                            pte_entry = self.read_long_long_phys(pte_curr)
-                            pte_curr = pte_curr + 8
-                            if self.entry_present(pte_entry):
+                    else:
+                        pte_table = read_table(entry & 0xFFFFFFFFFF000, table_struct, entry_size, read_entry)
+                        for k, pte_entry in enumerate(pte_table):
+                            if pte_entry and entry_present(pte_entry):
                                 yield (soffset + k * 0x1000, 0x1000)
 
     @classmethod
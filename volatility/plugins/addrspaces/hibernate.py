@@ -25,8 +25,14 @@
 # this code in Volatility.
 
 """ A Hiber file Address Space """
+import os
+import hashlib
+import tempfile
+import collections
+import cPickle as pickle
 import volatility.addrspace as addrspace
 import volatility.obj as obj
+import volatility.debug as debug
 import volatility.win32.xpress as xpress
 import struct
 
@@ -36,25 +42,36 @@ import struct
 PAGE_SIZE = 0x1000
 page_shift = 12
 
+## Bump this whenever the layout of the saved page index changes
+PAGE_INDEX_VERSION = 1
+
 class Store(object):
-    def __init__(self, limit = 50):
+    """ A least recently used cache of decompressed xpress blocks.
+
+    The cache is bounded by limit, the total number of bytes held,
+    rather than by the number of blocks.
+    """
+    def __init__(self, limit = 32 * 1024 * 1024):
         self.limit = limit
-        self.cache = {}
-        self.seq = []
+        self.cache = collections.OrderedDict()
         self.size = 0
 
     def put(self, key, item):
+        if key in self.cache:
+            self.size -= len(self.cache.pop(key))
         self.cache[key] = item
         self.size += len(item)
 
-        self.seq.append(key)
-        if len(self.seq) >= self.limit:
-            key = self.seq.pop(0)
-            self.size -= len(self.cache[key])
-            del self.cache[key]
+        ## Evict the least recently used blocks, but always keep the newest
+        while self.size > self.limit and len(self.cache) > 1:
+            _key, old = self.cache.popitem(last = False)
+            self.size -= len(old)
 
     def get(self, key):
-        return self.cache[key]
+        ## Move the block to the most recently used end
+        item = self.cache.pop(key)
+        self.cache[key] = item
+        return item
 
 class WindowsHiberFileSpace32(addrspace.BaseAddressSpace):
     """ This is a hibernate address space for windows hibernation files.
@@ -75,7 +92,7 @@ class WindowsHiberFileSpace32(addrspace.BaseAddressSpace):
         self.PageIndex = 0
         self.AddressList = []
         self.LookupCache = {}
-        self.PageCache = Store(50)
+        self.PageCache = Store(max(config.HIBER_CACHE_SIZE or 0, 1) * 1024 * 1024)
         self.MemRangeCnt = 0
         self.entry_count = 0xFF
 
@@ -106,6 +123,15 @@ class WindowsHiberFileSpace32(addrspace.BaseAddressSpace):
         # until it's absolutely necessary and/or convert it into a generator...
         self.build_page_cache()
 
+    @staticmethod
+    def register_options(config):
+        config.add_option("HIBER-CACHE-SIZE", type = 'int', default = 32,
+                          cache_invalidator = False,
+                          help = "Megabytes of decompressed hibernation file data to keep in memory")
+        config.add_option("NO-HIBER-INDEX", action = "store_true", default = False,
+                          cache_invalidator = False,
+                          help = "Do not load or save the hibernation file page index")
+
     def _get_first_table_page(self):
         if self.header != None:
             return self.header.FirstTablePage
@@ -115,6 +141,91 @@ class WindowsHiberFileSpace32(addrspace.BaseAddressSpace):
         return None
 
     def build_page_cache(self):
+        """Builds the page map, from the saved page index if there is one"""
+        filename = self.page_index_filename()
+        if filename and self.load_page_index(filename):
+            return
+
+        self.scan_memory_ranges()
+
+        if filename:
+            self.save_page_index(filename)
+
+    def page_index_filename(self):
+        """Returns the name of the page index file for the base image
+
+        The name is a hash of the image's path, size and modification
+        time, the profile's entry count, and the contents of the header
+        and first memory table pages, so that the index is not used for
+        an image that has changed. Returns None for images that are not
+        backed by a file.
+        """
+        fname = getattr(self.base, "fname", None)
+        if not fname or self._config.NO_HIBER_INDEX or not self._config.CACHE_DIRECTORY:
+            return None
+        try:
+            stat = os.stat(fname)
+        except OSError:
+            return None
+
+        key = hashlib.sha1()
+        key.update(repr((PAGE_INDEX_VERSION, os.path.abspath(fname), stat.st_size,
+                         stat.st_mtime, int(self.entry_count))))
+        key.update(self.base.read(0, PAGE_SIZE) or '')
+        key.update(self.base.read(self._get_first_table_page() * PAGE_SIZE, PAGE_SIZE) or '')
+
+        return os.path.join(self._config.CACHE_DIRECTORY, "hibernate", key.hexdigest() + ".idx")
+
+    def load_page_index(self, filename):
+        """Loads the page map from a saved page index, returns True on success"""
+        try:
+            with open(filename, "rb") as f:
+                index = pickle.load(f)
+            if index.get("version") != PAGE_INDEX_VERSION:
+                return False
+        except (IOError, EOFError, pickle.UnpicklingError, AttributeError, ValueError), e:
+            if os.path.exists(filename):
+                debug.debug("Unable to load hibernation page index {0}: {1}".format(filename, e))
+            return False
+
+        self.PageDict = index["PageDict"]
+        self.AddressList = index["AddressList"]
+        self.HighestPage = index["HighestPage"]
+        self.PageIndex = index["PageIndex"]
+        self.MemRangeCnt = index["MemRangeCnt"]
+
+        self.LookupCache = {}
+        for hoffset, pages in self.PageDict.iteritems():
+            for PageNumber, XpressBlockSize, XpressPage in pages:
+                self.LookupCache[PageNumber] = (hoffset, XpressBlockSize, XpressPage)
+
+        debug.debug("Loaded hibernation page index from {0}".format(filename))
+        return True
+
+    def save_page_index(self, filename):
+        """Saves the page map so that later runs can skip scan_memory_ranges"""
+        index = dict(version = PAGE_INDEX_VERSION,
+                     PageDict = self.PageDict,
+                     AddressList = self.AddressList,
+                     HighestPage = self.HighestPage,
+                     PageIndex = self.PageIndex,
+                     MemRangeCnt = self.MemRangeCnt)
+
+        directory = os.path.dirname(filename)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            ## Write to a temporary file first so that concurrent runs
+            ## never see a partial index
+            fd, tmpname = tempfile.mkstemp(dir = directory)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(index, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmpname, filename)
+        except (IOError, OSError), e:
+            debug.debug("Unable to save hibernation page index {0}: {1}".format(filename, e))
+
+    def scan_memory_ranges(self):
+        """Walks the memory range arrays and xpress headers to build the page map"""
         XpressIndex = 0
         XpressHeader = obj.Object("_IMAGE_XPRESS_HEADER",
                                   (self._get_first_table_page() + 1) * 4096,
@@ -289,7 +400,7 @@ class WindowsHiberFileSpace32(addrspace.BaseAddressSpace):
         return data[offset:offset + available]
 
     def read(self, addr, length, zread = False):
-        result = ''
+        result = []
         while length > 0:
             data = self._partial_read(addr, length)
             if not data:
@@ -297,8 +408,9 @@ class WindowsHiberFileSpace32(addrspace.BaseAddressSpace):
 
             addr += len(data)
             length -= len(data)
-            result += data
+            result.append(data)
 
+        result = ''.join(result)
         if result == '':
             if zread:
                 return ('\0' * length)
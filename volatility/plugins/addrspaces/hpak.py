@@ -78,12 +78,19 @@ class HPAKAddressSpace(standard.FileAddressSpace):
                 break
         
         self.as_assert(self.physmem is not None, "Cannot find the PHYSDUMP section")
+
+    def _map_file(self):
+        ## Every read is passed on to the base, so there's nothing to map
+        return None
                         
     def read(self, addr, length):
         return self.base.read(addr + self.physmem.Offset, length)
         
     def zread(self, addr, length):
         return self.base.zread(addr + self.physmem.Offset, length)
+
+    def unpack_from(self, structure, addr):
+        return self.base.unpack_from(structure, addr + self.physmem.Offset)
         
     def is_valid_address(self, addr):
         return self.base.is_valid_address(addr + self.physmem.Offset)
@@ -43,6 +43,13 @@ pde_shift = 21
 ptrs_per_pde = 512
 ptrs_page = 2048
 
+long_struct = struct.Struct('<I')
+long_long_struct = struct.Struct('<Q')
+pgd_table_struct = struct.Struct('<%dI' % ptrs_per_pgd)
+pte_table_struct = struct.Struct('<%dI' % ptrs_per_pte)
+pdpi_table_struct = struct.Struct('<%dQ' % ptrs_per_pdpi)
+pae_table_struct = struct.Struct('<%dQ' % ptrs_per_pae_pgd)
+
 class IA32PagedMemory(paged.AbstractWritablePagedMemory):
     """ Standard IA-32 paging address space.
 
@@ -107,7 +114,7 @@ class IA32PagedMemory(paged.AbstractWritablePagedMemory):
 
     def get_pgd(self, vaddr):
         pgd_entry = self.dtb + self.pgd_index(vaddr) * pointer_size
-        return self.read_long_phys(pgd_entry)
+        return self.read_long_phys(pgd_entry, cached = True)
 
     def pte_pfn(self, pte):
         return pte >> page_shift
@@ -126,44 +133,44 @@ class IA32PagedMemory(paged.AbstractWritablePagedMemory):
     def get_four_meg_paddr(self, vaddr, pgd_entry):
         return (pgd_entry & ((ptrs_per_pgd - 1) << 22)) | (vaddr & ~((ptrs_per_pgd - 1) << 22))
 
-    def vtop(self, vaddr):
+    def page_walk(self, vaddr):
         retVal = None
         pgd = self.get_pgd(vaddr)
         if self.entry_present(pgd):
             if self.page_size_flag(pgd):
-                retVal = self.get_four_meg_paddr(vaddr, pgd)
+                retVal = (self.get_four_meg_paddr(vaddr, pgd), 0x400000)
             else:
                 pte = self.get_pte(vaddr, pgd)
                 if not pte:
                     return None
                 if self.entry_present(pte):
-                    retVal = self.get_paddr(vaddr, pte)
+                    retVal = (self.get_paddr(vaddr, pte), 0x1000)
         return retVal
 
-    def read_long_phys(self, addr):
+    def read_long_phys(self, addr, cached = False):
         try:
-            string = self.base.read(addr, 4)
+            value = self.unpack_phys(long_struct, addr, cached)
         except IOError:
-            string = None
-        if not string:
+            value = None
+        if not value:
             return obj.NoneObject("Unable to read_long_phys at " + hex(addr))
-        (longval,) = struct.unpack('<I', string)
+        (longval,) = value
         return longval
 
     def get_available_pages(self):
-        pgd_curr = self.dtb
-        for i in range(0, ptrs_per_pgd):
+        entry_present = self.entry_present
+        pgd_table = self.read_table(self.dtb, pgd_table_struct, pointer_size, self.read_long_phys)
+        for i, entry in enumerate(pgd_table):
+            if not entry or not entry_present(entry):
+                continue
             start = (i * ptrs_per_pgd * ptrs_per_pte * 4)
-            entry = self.read_long_phys(pgd_curr)
-            pgd_curr = pgd_curr + 4
-            if self.entry_present(entry) and self.page_size_flag(entry):
+            if self.page_size_flag(entry):
                 yield (start, 0x400000)
-            elif self.entry_present(entry):
-                pte_curr = entry & ~((1 << page_shift) - 1)
-                for j in range(0, ptrs_per_pte):
-                    pte_entry = self.read_long_phys(pte_curr)
-                    pte_curr = pte_curr + 4
-                    if self.entry_present(pte_entry):
+            else:
+                pte_table = self.read_table(entry & ~((1 << page_shift) - 1), pte_table_struct,
+                                            pointer_size, self.read_long_phys)
+                for j, pte_entry in enumerate(pte_table):
+                    if pte_entry and entry_present(pte_entry):
                         yield (start + j * 0x1000, 0x1000)
 
 class IA32PagedMemoryPae(IA32PagedMemory):
@@ -198,7 +205,7 @@ class IA32PagedMemoryPae(IA32PagedMemory):
 
     def get_pdpi(self, vaddr):
         pdpi_entry = self.get_pdptb(self.dtb) + self.pdpi_index(vaddr) * entry_size
-        return self._read_long_long_phys(pdpi_entry)
+        return self._read_long_long_phys(pdpi_entry, cached = True)
 
     def pde_index(self, vaddr):
         return (vaddr >> pde_shift) & (ptrs_per_pde - 1)
@@ -208,7 +215,7 @@ class IA32PagedMemoryPae(IA32PagedMemory):
 
     def get_pgd(self, vaddr, pdpe):
         pgd_entry = self.pdba_base(pdpe) + self.pde_index(vaddr) * entry_size
-        return self._read_long_long_phys(pgd_entry)
+        return self._read_long_long_phys(pgd_entry, cached = True)
 
     def pte_pfn(self, pte):
         return pte & 0xFFFFFF000
@@ -229,7 +236,7 @@ class IA32PagedMemoryPae(IA32PagedMemory):
     def get_large_paddr(self, vaddr, pgd_entry):
         return (pgd_entry & 0xFFE00000) | (vaddr & ~((ptrs_page - 1) << 21))
 
-    def vtop(self, vaddr):
+    def page_walk(self, vaddr):
         retVal = None
         pdpe = self.get_pdpi(vaddr)
 
@@ -239,49 +246,47 @@ class IA32PagedMemoryPae(IA32PagedMemory):
         pgd = self.get_pgd(vaddr, pdpe)
         if self.entry_present(pgd):
             if self.page_size_flag(pgd):
-                retVal = self.get_large_paddr(vaddr, pgd)
+                retVal = (self.get_large_paddr(vaddr, pgd), 0x200000)
             else:
                 pte = self.get_pte(vaddr, pgd)
                 if self.entry_present(pte):
-                    retVal = self.get_paddr(vaddr, pte)
+                    retVal = (self.get_paddr(vaddr, pte), 0x1000)
 
         return retVal
 
-    def _read_long_long_phys(self, addr):
+    def _read_long_long_phys(self, addr, cached = False):
         try:
-            string = self.base.read(addr, 8)
+            value = self.unpack_phys(long_long_struct, addr, cached)
         except IOError:
-            string = None
-        if not string:
+            value = None
+        if not value:
             return obj.NoneObject("Unable to read base AS at " + hex(addr))
-        (longlongval,) = struct.unpack('<Q', string)
+        (longlongval,) = value
         return longlongval
 
     def get_available_pages(self):
+        entry_present = self.entry_present
+        pdpi_table = self.read_table(self.get_pdptb(self.dtb), pdpi_table_struct,
+                                     entry_size, self._read_long_long_phys)
 
-        pdpi_base = self.get_pdptb(self.dtb)
-
-        for i in range(0, ptrs_per_pdpi):
+        for i, pdpe in enumerate(pdpi_table):
 
-            start = (i * ptrs_per_pae_pgd * ptrs_per_pae_pgd * ptrs_per_pae_pte * 8)
-            pdpi_entry = pdpi_base + i * entry_size
-            pdpe = self._read_long_long_phys(pdpi_entry)
-
-            if not self.entry_present(pdpe):
+            if not pdpe or not entry_present(pdpe):
                 continue
 
-            pgd_curr = self.pdba_base(pdpe)
+            start = (i * ptrs_per_pae_pgd * ptrs_per_pae_pgd * ptrs_per_pae_pte * 8)
+            pgd_table = self.read_table(self.pdba_base(pdpe), pae_table_struct,
+                                        entry_size, self._read_long_long_phys)
 
-            for j in range(0, ptrs_per_pae_pgd):
+            for j, entry in enumerate(pgd_table):
+                if not entry or not entry_present(entry):
+                    continue
                 soffset = start + (j * ptrs_per_pae_pgd * ptrs_per_pae_pte * 8)
-                entry = self._read_long_long_phys(pgd_curr)
-                pgd_curr = pgd_curr + 8
-                if self.entry_present(entry) and self.page_size_flag(entry):
+                if self.page_size_flag(entry):
                     yield (soffset, 0x200000)
-                elif self.entry_present(entry):
-                    pte_curr = entry & ~((1 << page_shift) - 1)
-                    for k in range(0, ptrs_per_pae_pte):
-                        pte_entry = self._read_long_long_phys(pte_curr)
-                        pte_curr = pte_curr + 8
-                        if self.entry_present(pte_entry):
+                else:
+                    pte_table = self.read_table(entry & ~((1 << page_shift) - 1), pae_table_struct,
+                                                entry_size, self._read_long_long_phys)
+                    for k, pte_entry in enumerate(pte_table):
+                        if pte_entry and entry_present(pte_entry):
                             yield (soffset + k * 0x1000, 0x1000)
@@ -0,0 +1,204 @@
+# Volatility
+# Copyright (C) 2007-2013 Volatility Foundation
+#
+# This file is part of Volatility.
+#
+# Volatility is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License Version 2 as
+# published by the Free Software Foundation.  You may not use, modify or
+# distribute this program under any other version of the GNU General
+# Public License.
+#
+# Volatility is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Volatility.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+""" A read cache for physical address spaces """
+
+import collections
+import volatility.addrspace as addrspace
+
+#pylint: disable-msg=C0111
+
+page_size = 0x1000
+
+class PageCacheAddressSpace(addrspace.BaseAddressSpace):
+    """ Keeps the most recently read pages of a physical address space.
+
+    utils.load_as stacks this on top of the physical layer (the image file
+    and any crash dump, LiME, VMware etc. layer on it), so that the paged
+    address spaces and plugins above it share the cached pages.  It never
+    takes part in the normal voting; see wrap().
+
+    Reads are served a whole page at a time, with the least recently used
+    pages evicted once --page-cache-size bytes are held.  Misses that
+    follow on from the previous miss read ahead, doubling the number of
+    pages read at once up to max_readahead.  Reads bigger than that (such
+    as scanner chunks) and reads that touch pages which can't be read
+    whole go straight to the base.
+    """
+    max_readahead = 16
+
+    def __init__(self, base, config, cache_layer = False, **kwargs):
+        ## Only utils.load_as stacks us, the voting never picks us
+        self.as_assert(cache_layer, "Page cache is only stacked by load_as")
+        self.as_assert(base, "No base Address Space")
+        addrspace.BaseAddressSpace.__init__(self, base, config, **kwargs)
+        self.name = getattr(base, "name", "Unnamed AS")
+
+        self.max_pages = max(1, (config.PAGE_CACHE_SIZE or 0) // page_size)
+        self._pages = collections.OrderedDict()
+        self._last_miss = None
+        self._readahead = 1
+
+        self.hits = 0
+        self.misses = 0
+        self.readahead_pages = 0
+        self.uncached_reads = 0
+
+    @staticmethod
+    def register_options(config):
+        config.add_option("PAGE-CACHE-SIZE", type = 'int', default = 32 * 1024 * 1024,
+                          cache_invalidator = False,
+                          help = "Bytes of physical memory pages cached by the page cache (0 disables)")
+
+    @classmethod
+    def wrap(cls, base, config):
+        """Returns base with a page cache stacked on it, or base itself if
+        caching is disabled, base is cached already or would not gain from
+        it (a memory mapped file is as fast as the cache)"""
+        if not config.PAGE_CACHE_SIZE or config.WRITE or base is None:
+            return base
+        if isinstance(base, cls) or getattr(base, "fmap", None) is not None:
+            return base
+        return cls(base, config, cache_layer = True)
+
+    def __getattr__(self, attr):
+        ## Anything we don't handle (headers, dtb, fname...) comes from
+        ## the layer we cache, so the stack looks the same to plugins
+        if attr.startswith("__") or attr in ("base", "_pages"):
+            raise AttributeError(attr)
+        return getattr(self.base, attr)
+
+    def __getstate__(self):
+        result = addrspace.BaseAddressSpace.__getstate__(self)
+        result['cache_layer'] = True
+        return result
+
+    def _fill(self, page):
+        """Reads the page at address page, and any read ahead, into the
+        cache, returning its data or None if it can't be read whole"""
+        self.misses += 1
+        if self._last_miss is not None and page == self._last_miss + page_size:
+            self._readahead = min(self._readahead * 2, self.max_readahead)
+        else:
+            self._readahead = 1
+        count = min(self._readahead, self.max_pages)
+        self._last_miss = page + (count - 1) * page_size
+
+        data = None
+        if count > 1:
+            data = self.base.read(page, count * page_size)
+            if data and len(data) == count * page_size:
+                self.readahead_pages += count - 1
+            else:
+                data = None
+                count = 1
+                self._last_miss = page
+        if data is None:
+            data = self.base.read(page, page_size)
+            if not data or len(data) != page_size:
+                data = None
+
+        pages = self._pages
+        for i in range(count):
+            while len(pages) >= self.max_pages:
+                pages.popitem(last = False)
+            pages[page + i * page_size] = data and data[i * page_size:(i + 1) * page_size]
+        return pages[page]
+
+    def _get_page(self, page):
+        pages = self._pages
+        try:
+            ## Move the page to the most recently used end
+            data = pages.pop(page)
+        except KeyError:
+            return self._fill(page)
+        pages[page] = data
+        self.hits += 1
+        return data
+
+    def _read_cached(self, addr, length):
+        """Returns the data from the cache, or None if any of it can't be"""
+        if addr < 0 or length <= 0 or length > self.max_readahead * page_size:
+            return None
+        first = addr - (addr % page_size)
+        start = addr - first
+        if start + length <= page_size:
+            data = self._get_page(first)
+            return data and data[start:start + length]
+
+        data = []
+        page = first
+        while page < addr + length:
+            page_data = self._get_page(page)
+            if page_data is None:
+                return None
+            data.append(page_data)
+            page += page_size
+        return "".join(data)[start:start + length]
+
+    def read(self, addr, length):
+        addr, length = int(addr), int(length)
+        data = self._read_cached(addr, length)
+        if data is None:
+            self.uncached_reads += 1
+            return self.base.read(addr, length)
+        return data
+
+    def zread(self, addr, length):
+        addr, length = int(addr), int(length)
+        data = self._read_cached(addr, length)
+        if data is None:
+            self.uncached_reads += 1
+            return self.base.zread(addr, length)
+        return data
+
+    def unpack_from(self, structure, addr):
+        """Returns the tuple unpacked by a struct.Struct at addr,
+        or None if the whole structure cannot be read"""
+        data = self.read(addr, structure.size)
+        if not data or len(data) != structure.size:
+            return None
+        return structure.unpack(data)
+
+    def is_valid_address(self, addr):
+        return self.base.is_valid_address(addr)
+
+    def get_available_addresses(self):
+        return self.base.get_available_addresses()
+
+    def write(self, addr, data):
+        self.flush()
+        return self.base.write(addr, data)
+
+    def flush(self):
+        """Discards all the cached pages"""
+        self._pages.clear()
+        self._last_miss = None
+
+    def get_cache_stats(self):
+        """Returns a dictionary of cache counters, for tuning --page-cache-size"""
+        lookups = self.hits + self.misses
+        return dict(hits = self.hits,
+                    misses = self.misses,
+                    hit_rate = float(self.hits) / lookups if lookups else 0.0,
+                    readahead_pages = self.readahead_pages,
+                    uncached_reads = self.uncached_reads,
+                    pages = len(self._pages),
+                    bytes = len(self._pages) * page_size)
@@ -22,17 +22,39 @@
 import volatility.addrspace as addrspace
 import volatility.obj as obj
 
+page_shift = 12
+page_mask = (1 << page_shift) - 1
+
+# Marks a virtual page number the TLB knows nothing about, as opposed to 
+# a cached translation to None for a page that is not present
+_tlb_miss = object()
+
 class AbstractPagedMemory(addrspace.AbstractVirtualAddressSpace):
     """ Class to handle all the details of a paged virtual address space
         
     Note: Pages can be of any size
     """
     checkname = "Intel"
+    # Default number of translations held in the TLB and of page table
+    # pages held in the table cache
+    tlb_size = 4096
+    table_cache_size = 1024
 
     def __init__(self, base, config, dtb = 0, skip_as_check = False, *args, **kwargs):
         ## We must be stacked on someone else:
         self.as_assert(base, "No base Address Space")
 
+        ## The TLB has to exist before the address space check calls vtop
+        if config.TLB_SIZE is not None:
+            self.tlb_size = config.TLB_SIZE
+        self.tlb_hits = 0
+        self.tlb_misses = 0
+        self.tlb_flushes = 0
+        self._tlb_dtb = None
+        self._tlb = {}
+        self._tlb_large = {}
+        self._table_cache = {}
+
         addrspace.AbstractVirtualAddressSpace.__init__(self, base, config, *args, **kwargs)
 
         ## We can not stack on someone with a dtb
@@ -84,10 +106,144 @@ class AbstractPagedMemory(addrspace.AbstractVirtualAddressSpace):
         config.add_option("DTB", type = 'int', default = 0,
                           help = "DTB Address")
 
-    def vtop(self, addr):
-        """Abstract function that converts virtual (paged) addresses to physical addresses"""
+        config.add_option("TLB-SIZE", type = 'int', default = AbstractPagedMemory.tlb_size,
+                          cache_invalidator = False,
+                          help = "Number of page translations cached by each paged address space (0 disables)")
+
+    def unpack_phys(self, structure, addr, cached = False):
+        """Returns the tuple unpacked by a struct.Struct at the physical 
+           address addr, or None if it cannot be read. 
+
+           Bases that provide unpack_from (such as a memory mapped 
+           FileAddressSpace) can do this without an intermediate string.
+
+           If cached is True the whole page containing addr is kept in 
+           the table cache, which is meant for the upper levels of the 
+           page tables that nearly every translation walks through.
+        """
+        if cached and self.tlb_size:
+            page = addr & ~page_mask
+            data = self._table_cache.get(page)
+            if data is None:
+                data = self.base.read(page, page_mask + 1)
+                if data and len(data) == page_mask + 1:
+                    if len(self._table_cache) >= self.table_cache_size:
+                        self._table_cache.clear()
+                    self._table_cache[page] = data
+                else:
+                    data = None
+            if data is not None and (addr - page) + structure.size <= len(data):
+                return structure.unpack_from(data, addr - page)
+
+        unpack_from = getattr(self.base, "unpack_from", None)
+        if unpack_from is not None:
+            return unpack_from(structure, addr)
+        data = self.base.read(addr, structure.size)
+        if not data or len(data) != structure.size:
+            return None
+        return structure.unpack(data)
+
+    def read_table(self, addr, structure, entry_size, read_entry):
+        """Returns all the entries of the page table at the physical 
+           address addr, as a sequence of integers.
+
+           The table is read and unpacked by structure (a struct.Struct 
+           covering every entry) in one go. If it cannot be read whole, 
+           for instance because it straddles a hole in the image, the 
+           entries are read one at a time with read_entry instead, so 
+           that unreadable ones come back as NoneObjects.
+        """
+        try:
+            data = self.base.read(addr, structure.size)
+        except IOError:
+            data = None
+        if data and len(data) == structure.size:
+            return structure.unpack(data)
+        return [read_entry(addr + i * entry_size) for i in xrange(structure.size // entry_size)]
+
+    def page_walk(self, vaddr):
+        """Abstract function that walks the page tables for a virtual address
+
+           Returns a tuple of (physical address, page size), or None if 
+           the address is not mapped.
+        """
         pass
 
+    def vtop(self, vaddr):
+        """Converts virtual (paged) addresses to physical addresses
+
+           Translations are looked up in a per address space TLB, keyed by 
+           virtual page number (or by large page number for 2MB, 4MB and 
+           1GB pages), before falling back to walking the page tables. 
+           The TLB is flushed whenever the dtb changes, or once it holds 
+           tlb_size translations.
+        """
+        if isinstance(vaddr, obj.NoneObject):
+            return None
+
+        if not self.tlb_size:
+            result = self.page_walk(vaddr)
+            if result is None:
+                return None
+            return result[0]
+
+        vaddr = long(vaddr)
+
+        if self.dtb != self._tlb_dtb:
+            self.flush_tlb()
+
+        vpn = vaddr >> page_shift
+        frame = self._tlb.get(vpn, _tlb_miss)
+        if frame is not _tlb_miss:
+            self.tlb_hits += 1
+            if frame is None:
+                return None
+            return frame | (vaddr & page_mask)
+
+        for shift, entries in self._tlb_large.iteritems():
+            frame = entries.get(vaddr >> shift, _tlb_miss)
+            if frame is not _tlb_miss:
+                self.tlb_hits += 1
+                return frame | (vaddr & ((1 << shift) - 1))
+
+        self.tlb_misses += 1
+        result = self.page_walk(vaddr)
+        if result is None:
+            self._tlb_insert(self._tlb, vpn, None)
+            return None
+
+        paddr, size = result
+        offset = vaddr & (size - 1)
+        if size == page_mask + 1:
+            self._tlb_insert(self._tlb, vpn, paddr - offset)
+        else:
+            shift = size.bit_length() - 1
+            entries = self._tlb_large.setdefault(shift, {})
+            self._tlb_insert(entries, vaddr >> shift, paddr - offset)
+        return paddr
+
+    def _tlb_insert(self, entries, key, frame):
+        """Adds a translation to one of the TLB tables, flushing it when full"""
+        if len(entries) >= self.tlb_size:
+            entries.clear()
+            self.tlb_flushes += 1
+        entries[key] = frame
+
+    def flush_tlb(self):
+        """Discards all cached translations and page table pages"""
+        self._tlb_dtb = self.dtb
+        self._tlb.clear()
+        self._tlb_large.clear()
+        self._table_cache.clear()
+
+    def get_tlb_stats(self):
+        """Returns a dictionary of TLB counters, for tuning --tlb-size"""
+        return dict(hits = self.tlb_hits,
+                    misses = self.tlb_misses,
+                    flushes = self.tlb_flushes,
+                    entries = len(self._tlb) + sum(len(e) for e in self._tlb_large.values()),
+                    table_pages = len(self._table_cache))
+
     def get_available_pages(self):
         """A generator that returns (addr, size) for each of the virtual addresses present, sorted by offset"""
         pass
@@ -29,6 +29,8 @@ import struct
 import volatility.addrspace as addrspace
 import volatility.debug as debug #pylint: disable-msg=W0611
 import urllib
+import mmap
+import sys
 import os
 
 #pylint: disable-msg=C0111
@@ -66,6 +68,12 @@ class FileAddressSpace(addrspace.BaseAddressSpace):
     
     3) base == None (we dont operate on anyone else so we need to be
     right at the bottom of the AS stack.)
+
+    On 64-bit hosts the file is memory mapped (unless --no-mmap is given),
+    so reads are slices of the mapping rather than a seek and read on the
+    file handle. Write mode, files that cannot be mapped (such as devices)
+    and 32-bit hosts, where large images would not fit in the address
+    space, use the file handle instead.
     """
     ## We should be the AS of last resort
     order = 100
@@ -84,12 +92,29 @@ class FileAddressSpace(addrspace.BaseAddressSpace):
         self.fhandle = open(self.fname, self.mode)
         self.fhandle.seek(0, 2)
         self.fsize = self.fhandle.tell()
+        self.fmap = self._map_file()
+
+    def _map_file(self):
+        """Returns a read-only memory map of the file, or None if it shouldn't be mapped"""
+        if self._config.WRITE or self._config.NO_MMAP:
+            return None
+        # Only map files where the whole image fits in our address space
+        if sys.maxsize <= 2 ** 32 or not self.fsize or not os.path.isfile(self.fname):
+            return None
+        try:
+            return mmap.mmap(self.fhandle.fileno(), 0, access = mmap.ACCESS_READ)
+        except (EnvironmentError, ValueError, OverflowError), e:
+            debug.debug("Unable to mmap {0}, falling back to file reads: {1}".format(self.fname, e))
+            return None
 
     # Abstract Classes cannot register options, and since this checks config.WRITE in __init__, we define the option here
     @staticmethod
     def register_options(config):
         config.add_option("WRITE", short_option = 'w', action = "callback", default = False,
                           help = "Enable write support", callback = write_callback)
+        config.add_option("NO-MMAP", action = "store_true", default = False,
+                          cache_invalidator = False,
+                          help = "Read image files through file handles rather than memory mapping them")
 
     def fread(self, length):
         length = int(length)
@@ -97,12 +122,31 @@ class FileAddressSpace(addrspace.BaseAddressSpace):
 
     def read(self, addr, length):
         addr, length = int(addr), int(length)
-        self.fhandle.seek(addr)
-        data = self.fhandle.read(length)
+        if self.fmap is not None:
+            # Mimic the IOError from seeking to a negative offset
+            if addr < 0:
+                raise IOError("Invalid offset {0:#x} in {1}".format(addr, self.fname))
+            data = self.fmap[addr:addr + length]
+        else:
+            self.fhandle.seek(addr)
+            data = self.fhandle.read(length)
         if len(data) == 0:
             return None
         return data
 
+    def unpack_from(self, structure, addr):
+        """Returns the tuple unpacked by a struct.Struct at addr,
+        or None if the whole structure cannot be read"""
+        addr = int(addr)
+        if self.fmap is not None:
+            if 0 <= addr and addr + structure.size <= self.fsize:
+                return structure.unpack_from(self.fmap, addr)
+            return None
+        data = self.read(addr, structure.size)
+        if not data or len(data) != structure.size:
+            return None
+        return structure.unpack(data)
+
     def zread(self, addr, length):
         data = self.read(addr, length)
         if data is None:
@@ -127,6 +171,8 @@ class FileAddressSpace(addrspace.BaseAddressSpace):
         return 0 <= addr < self.fsize
 
     def close(self):
+        if self.fmap is not None:
+            self.fmap.close()
         self.fhandle.close()
 
     def write(self, addr, data):
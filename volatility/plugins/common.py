@@ -64,6 +64,9 @@ class PoolTagCheck(scan.ScannerCheck):
         data = self.address_space.read(offset, len(self.tag))
         return data == self.tag
 
+    def get_needles(self):
+        return [self.tag]
+
 class CheckPoolSize(scan.ScannerCheck):
     """ Check pool block size """
     def __init__(self, address_space, condition = (lambda x: x == 8), **kwargs):
@@ -426,7 +426,8 @@ class PSScan(common.AbstractWindowsCommand):
         for offset in PoolScanProcess().scan(address_space):
             eprocess = obj.Object('_EPROCESS', vm = address_space,
                                   native_vm = kernel_as, offset = offset)
-            yield eprocess
+            # Read the whole struct once, since most of its fields get rendered
+            yield eprocess.snapshot()
 
 
     def render_text(self, outfd, data):
@@ -20,7 +20,7 @@
 #
 
 import volatility.obj as obj
-import volatility.plugins.gui.vtypes.win7_sp0_x64_vtypes_gui as win7_sp0_x64_vtypes_gui
+import volatility.registry as registry
 import volatility.plugins.gui.constants as consts
 
 class Vista2008x64GuiVTypes(obj.ProfileModification):
@@ -38,7 +38,8 @@ class Vista2008x64GuiVTypes(obj.ProfileModification):
         ## because we typically when we re-use, we do it forward (i.e. use 
         ## an older OS's types for a newer OS). However since the win32k.sys
         ## vtypes were never public until Windows 7, we're re-using backward.
-        profile.vtypes.update(win7_sp0_x64_vtypes_gui.win32k_types)
+        module = registry.load_module("volatility.plugins.gui.vtypes.win7_sp0_x64_vtypes_gui")
+        profile.vtypes.update(module.win32k_types)
 
         # We don't want to overlay or HeEntrySize from Win7 will
         # appear to be a valid member of the Vista structure.
@@ -22,10 +22,7 @@
 import volatility.obj as obj
 import volatility.plugins.gui.constants as consts
 import volatility.plugins.gui.win32k_core as win32k_core
-import volatility.plugins.gui.vtypes.win7_sp0_x64_vtypes_gui as win7_sp0_x64_vtypes_gui
-import volatility.plugins.gui.vtypes.win7_sp0_x86_vtypes_gui as win7_sp0_x86_vtypes_gui
-import volatility.plugins.gui.vtypes.win7_sp1_x64_vtypes_gui as win7_sp1_x64_vtypes_gui
-import volatility.plugins.gui.vtypes.win7_sp1_x86_vtypes_gui as win7_sp1_x86_vtypes_gui
+import volatility.registry as registry
 
 class Win7SP0x64GuiVTypes(obj.ProfileModification):
     """Apply the base vtypes for Windows 7 SP0 x64"""
@@ -37,7 +34,8 @@ class Win7SP0x64GuiVTypes(obj.ProfileModification):
                   'build': lambda x : x == 7600}
 
     def modification(self, profile):
-        profile.vtypes.update(win7_sp0_x64_vtypes_gui.win32k_types)
+        module = registry.load_module("volatility.plugins.gui.vtypes.win7_sp0_x64_vtypes_gui")
+        profile.vtypes.update(module.win32k_types)
 
 class Win7SP1x64GuiVTypes(obj.ProfileModification):
     """Apply the base vtypes for Windows 7 SP1 x64"""
@@ -49,7 +47,8 @@ class Win7SP1x64GuiVTypes(obj.ProfileModification):
                   'build': lambda x : x == 7601}
 
     def modification(self, profile):
-        profile.vtypes.update(win7_sp1_x64_vtypes_gui.win32k_types)
+        module = registry.load_module("volatility.plugins.gui.vtypes.win7_sp1_x64_vtypes_gui")
+        profile.vtypes.update(module.win32k_types)
 
 class Win7SP0x86GuiVTypes(obj.ProfileModification):
     """Apply the base vtypes for Windows 7 SP0 x86"""
@@ -61,7 +60,8 @@ class Win7SP0x86GuiVTypes(obj.ProfileModification):
                   'build': lambda x : x == 7600}
 
     def modification(self, profile):
-        profile.vtypes.update(win7_sp0_x86_vtypes_gui.win32k_types)
+        module = registry.load_module("volatility.plugins.gui.vtypes.win7_sp0_x86_vtypes_gui")
+        profile.vtypes.update(module.win32k_types)
 
 class Win7SP1x86GuiVTypes(obj.ProfileModification):
     """Apply the base vtypes for Windows 7 SP1 x86"""
@@ -73,7 +73,8 @@ class Win7SP1x86GuiVTypes(obj.ProfileModification):
                   'build': lambda x : x == 7601}
 
     def modification(self, profile):
-        profile.vtypes.update(win7_sp1_x86_vtypes_gui.win32k_types)
+        module = registry.load_module("volatility.plugins.gui.vtypes.win7_sp1_x86_vtypes_gui")
+        profile.vtypes.update(module.win32k_types)
 
 class Win7GuiOverlay(obj.ProfileModification):
     """Apply general overlays for Windows 7"""
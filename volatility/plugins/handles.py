@@ -73,6 +73,7 @@ class Handles(taskmods.DllList):
             pid = task.UniqueProcessId
             if task.ObjectTable.HandleTableList:
                 for handle in task.ObjectTable.handles():
+                    handle = handle.snapshot()
                     name = ""
                     object_type = handle.get_object_type()
                     if object_type == "File":
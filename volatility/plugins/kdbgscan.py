@@ -58,6 +58,9 @@ class MultiStringFinderCheck(scan.ScannerCheck):
                 nextval = min(nextval, dindex)
         return nextval - offset
 
+    def get_needles(self):
+        return list(self.needles)
+
 class MultiPrefixFinderCheck(MultiStringFinderCheck):
     """ Checks for multiple strings per page, finishing at the offset """
     def check(self, offset):
@@ -67,6 +70,10 @@ class MultiPrefixFinderCheck(MultiStringFinderCheck):
                 return True
         return False
 
+    def get_needles(self):
+        # The needles finish at the offset rather than start there
+        return []
+
 class KDBGScanner(scan.BaseScanner):
     checks = [ ]
 
@@ -25,6 +25,7 @@
 @organization: 
 """
 
+import bisect
 import volatility.commands as commands
 import volatility.utils as utils
 import volatility.debug as debug
@@ -50,6 +51,8 @@ class AbstractLinuxCommand(commands.Command):
     def __init__(self, *args, **kwargs):
         self.addr_space = None
         self.known_addrs = {}
+        self.kernel_text = None
+        self.module_ranges = None
         commands.Command.__init__(self, *args, **kwargs)
 
     @property
@@ -67,18 +70,44 @@ class AbstractLinuxCommand(commands.Command):
 
     def is_known_address(self, addr, modules):
 
-        text = self.profile.get_symbol("_text")
-        etext = self.profile.get_symbol("_etext")
+        if self.kernel_text is None:
+            text = self.profile.get_symbol("_text")
+            etext = self.profile.get_symbol("_etext")
+            self.kernel_text = (int(self.addr_space.address_mask(text)), int(self.addr_space.address_mask(etext)))
 
-        return (self.addr_space.address_compare(addr, text) != -1 and self.addr_space.address_compare(addr, etext) == -1) or self.address_in_module(addr, modules)
+        (text, etext) = self.kernel_text
+        masked = int(self.addr_space.address_mask(addr))
+
+        return (text <= masked < etext) or self.address_in_module(addr, modules)
+
+    def _get_module_ranges(self, modules):
+        """Returns the module start addresses in sorted order, along with
+        the highest end address seen up to each of them"""
+
+        if self.module_ranges is None or self.module_ranges[0] is not modules:
+            mask = self.addr_space.address_mask
+            ranges = sorted((int(mask(start)), int(mask(end))) for (_, start, end) in modules)
+
+            starts = []
+            ends = []
+            high = None
+            for (start, end) in ranges:
+                high = max(high, end)
+                starts.append(start)
+                ends.append(high)
+
+            self.module_ranges = (modules, starts, ends)
+
+        return self.module_ranges[1:]
 
     def address_in_module(self, addr, modules):
-    
-        for (_, start, end) in modules:
-            if self.addr_space.address_compare(addr, start) != -1 and self.addr_space.address_compare(addr, end) == -1:
-                return True
-    
-        return False
+
+        starts, ends = self._get_module_ranges(modules)
+        masked = int(self.addr_space.address_mask(addr))
+
+        idx = bisect.bisect_right(starts, masked)
+
+        return idx > 0 and masked < ends[idx - 1]
 
     def verify_ops(self, ops, op_members, modules):
 
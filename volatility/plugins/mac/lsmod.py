@@ -38,7 +38,11 @@ class mac_lsmod(common.AbstractMacCommand):
         kmodaddr = obj.Object("Pointer", offset = p, vm = self.addr_space)
         kmod = kmodaddr.dereference_as("kmod_info") 
 
+        ## Each kmod_info is read from its page(s) in one go
+        cache = obj.PageCache(self.addr_space)
+
         while kmod.is_valid():
+            kmod = cache.snapshot(kmod)
             yield kmod
             kmod = kmod.next
 
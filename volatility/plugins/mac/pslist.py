@@ -50,7 +50,10 @@ class mac_pslist(common.AbstractMacCommand):
 
         procsaddr = obj.Object("proclist", offset = p, vm = self.addr_space)
         proc = obj.Object("proc", offset = procsaddr.lh_first, vm = self.addr_space)
-        seen = []
+        seen = set()
+
+        ## Each proc is read from its page(s) in one go
+        cache = obj.PageCache(self.addr_space)
 
         while proc.is_valid():
     
@@ -58,7 +61,9 @@ class mac_pslist(common.AbstractMacCommand):
                 debug.warning("Recursive process list detected (a result of non-atomic acquisition). Use mac_tasks or mac_psxview)")
                 break
             else:
-                seen.append(proc.obj_offset)
+                seen.add(proc.obj_offset)
+
+            proc = cache.snapshot(proc)
 
             if not pidlist or proc.p_pid in pidlist:
                 yield proc 
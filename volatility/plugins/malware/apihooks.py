@@ -154,6 +154,50 @@ class ModuleGroup(object):
 
         return obj.NoneObject("")
 
+class PageRecorder(object):
+    """Stands in for an address space and notes which pages are read
+    through it. Everything else is passed through to the address space.
+
+    Two processes that map a page to the same physical page read the
+    same data from it, so anything worked out from the pages that were
+    read holds for every process whose dependencies() match."""
+
+    def __init__(self, base):
+        self.base = base
+        self.pages = set()
+
+    def __getattr__(self, attr):
+        if attr.startswith("__") or attr in ("base", "pages"):
+            raise AttributeError(attr)
+        return getattr(self.base, attr)
+
+    def _note(self, addr, length):
+        if addr is None:
+            return
+        page = int(addr) & ~0xFFF
+        while page < addr + max(length, 1):
+            self.pages.add(page)
+            page += 0x1000
+
+    def read(self, addr, length):
+        self._note(addr, length)
+        return self.base.read(addr, length)
+
+    def zread(self, addr, length):
+        self._note(addr, length)
+        return self.base.zread(addr, length)
+
+    def is_valid_address(self, addr):
+        self._note(addr, 1)
+        return self.base.is_valid_address(addr)
+
+    def dependencies(self):
+        """Returns a tuple of (page, physical page) for every page read,
+        or None if the address space can't translate addresses"""
+        if not hasattr(self.base, "vtop"):
+            return None
+        return tuple((page, self.base.vtop(page)) for page in sorted(self.pages))
+
 #--------------------------------------------------------------------------------
 # Hook Class
 #--------------------------------------------------------------------------------
@@ -351,6 +395,14 @@ class ApiHooks(procdump.ProcExeDump):
 
         self.compiled_rules = self.compile()
 
+        # Export/import tables and inline hook verdicts, keyed by module 
+        # and function, along with the pages each one was read from. 
+        # Shared DLLs map the same physical pages in nearly every process,
+        # so they are only analyzed again where a page differs. 
+        self.shared_results = {}
+        self.shared_hits = 0
+        self.shared_misses = 0
+
         # When the --quick option is set, we only scan the processes
         # and dlls in these lists. Feel free to adjust them for
         # your own purposes. 
@@ -445,9 +497,11 @@ class ApiHooks(procdump.ProcExeDump):
         @param module_group: a ModuleGroup instance for the process. 
         """
 
+        exports = module.export_index()
+
         # Resolve the real location of KiFastSystem Call for comparison 
-        KiFastSystemCall = module.getprocaddress("KiFastSystemCall")
-        KiIntSystemCall = module.getprocaddress("KiIntSystemCall")
+        KiFastSystemCall = exports.getprocaddress("KiFastSystemCall")
+        KiIntSystemCall = exports.getprocaddress("KiIntSystemCall")
 
         if not KiFastSystemCall or not KiIntSystemCall:
             #debug.debug("Abort check_syscall, can't find KiFastSystemCall")
@@ -458,7 +512,7 @@ class ApiHooks(procdump.ProcExeDump):
         KiIntSystemCall += module.DllBase 
 
         # Check each exported function if its an NT syscall
-        for _, f, n in module.exports():
+        for _, f, n in exports.exports:
 
             # Ignore forwarded exports 
             if not f:
@@ -833,6 +887,83 @@ class ApiHooks(procdump.ProcExeDump):
 
         return imports, exports
 
+    # Number of differing copies of a result kept for each key
+    max_shared_variants = 8
+
+    def shared_result(self, key, addr_space, translated, analyze):
+        """
+        Return analyze(space), reusing an earlier result for the key if
+        each page it was worked out from maps to the same physical page
+        in addr_space. 
+
+        @param key: identifies what is analyzed (i.e. a module or function)
+
+        @param addr_space: the AS the analysis reads from 
+
+        @param translated: a dictionary of page translations for
+            addr_space, shared between calls for the same process. 
+
+        @param analyze: a function which takes the AS to read from (a 
+            PageRecorder for addr_space) and returns the result. 
+        """
+        variants = self.shared_results.get(key, [])
+
+        for dependencies, result in variants:
+            for page, physical in dependencies:
+                if page not in translated:
+                    translated[page] = addr_space.vtop(page)
+                if translated[page] != physical:
+                    break
+            else:
+                self.shared_hits += 1
+                return result
+
+        self.shared_misses += 1
+        recorder = PageRecorder(addr_space)
+        result = analyze(recorder)
+        dependencies = recorder.dependencies()
+
+        if dependencies is not None:
+            variants.append((dependencies, result))
+            self.shared_results[key] = variants[-self.max_shared_variants:]
+
+        return result
+
+    def gather_names(self, addr_space, module):
+        """Return gather_stuff() for the module reading its image from 
+        addr_space, with the ordinals and addresses as integers (or None)
+        and the names as strings so the result does not depend on any 
+        further reads"""
+
+        module = obj.Object("_LDR_DATA_TABLE_ENTRY", offset = module.obj_offset,
+                            vm = module.obj_vm, native_vm = addr_space,
+                            parent = module.obj_parent)
+
+        imports, exports = self.gather_stuff(addr_space, module)
+
+        def plain(o, f, n):
+            return (None if o == None else int(o), None if f == None else int(f), str(n or ''))
+
+        imports = dict((dll, [plain(o, f, n) for o, f, n in functions])
+                       for dll, functions in imports.items())
+        exports = [plain(o, f, n) for o, f, n in exports]
+
+        return imports, exports
+
+    def inline_verdict(self, va, addr_space, mem_start, mem_end):
+        """Return check_inline() with the hook destination as an integer
+        so the result does not depend on any further reads"""
+
+        ret = self.check_inline(va, addr_space, mem_start, mem_end)
+        if ret == None:
+            return None
+
+        (hooked, data, dest_addr) = ret
+        if isinstance(dest_addr, obj.BaseObject):
+            dest_addr = dest_addr.v()
+
+        return hooked, data, dest_addr
+
     def get_hooks(self, hook_mode, addr_space, module, module_group):
         """Enumerate IAT, EAT, Inline hooks. Also acts as a dispatcher 
         for NT syscall, UCP scans, and winsock procedure table hooks. 
@@ -867,8 +998,15 @@ class ApiHooks(procdump.ProcExeDump):
                 for hook in self.check_ucpcall(addr_space, module, module_group):
                     yield hook
 
-        imports, exports = \
-            self.gather_stuff(addr_space, module)
+        mod_base = int(module.DllBase)
+        mod_end = mod_base + int(module.SizeOfImage)
+
+        # The image is read from the module's own AS
+        image_space = module.obj_native_vm
+        imports, exports = self.shared_result(("tables", mod_base, mod_end),
+            image_space, {}, lambda space: self.gather_names(space, module))
+
+        translated = {}
 
         for dll, functions in imports.items():
 
@@ -929,8 +1067,9 @@ class ApiHooks(procdump.ProcExeDump):
                 # No need to check for inline hooks if EAT is hooked
                 continue
 
-            ret = self.check_inline(function_address, addr_space,
-                module.DllBase, module.DllBase + module.SizeOfImage)
+            ret = self.shared_result(("inline", int(function_address), mod_base, mod_end),
+                addr_space, translated, lambda space: self.inline_verdict(
+                function_address, space, mod_base, mod_end))
 
             if ret == None:
                 #debug.debug("Cannot analyze {0}".format(n or ''))
@@ -1014,6 +1153,9 @@ class ApiHooks(procdump.ProcExeDump):
                             process_space, dll, module_group):
                         yield proc, dll, hook
 
+            debug.debug("Reused {0} of {1} export/import tables and inline checks".format(
+                self.shared_hits, self.shared_hits + self.shared_misses))
+
         if not self._config.SKIP_KERNEL:
             process_list = list(tasks.pslist(addr_space))
             module_group = ModuleGroup(modules.lsmod(addr_space))
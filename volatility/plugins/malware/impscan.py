@@ -92,7 +92,7 @@ class ImpScan(common.AbstractWindowsCommand):
         exports = {}
 
         for mod in all_mods:
-            for ordinal, func_addr, func_name in mod.exports():
+            for ordinal, func_addr, func_name in mod.export_index().exports:
                 # This value should only be None if its forwarded
                 if func_addr != None:
                     name = func_name or ordinal or ''
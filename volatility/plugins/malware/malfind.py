@@ -25,6 +25,7 @@
 import os
 import volatility.utils as utils
 import volatility.obj as obj
+import volatility.scan as scan
 import volatility.debug as debug
 import volatility.win32.tasks as tasks
 import volatility.win32.modules as modules
@@ -284,25 +285,53 @@ class BaseYaraScanner(object):
         self.rules = rules
         self.address_space = address_space
 
-    def scan(self, offset, maxlen):
+    def get_blocks(self, offset, maxlen):
+        """Yields the (offset, length) of each block to be matched"""
         # Start scanning from offset until maxlen:
         i = offset
 
         while i < offset + maxlen:
-            # Read some data and match it.
             to_read = min(constants.SCAN_BLOCKSIZE + self.overlap, offset + maxlen - i)
-            data = self.address_space.zread(i, to_read)
-            if data:
-                for match in self.rules.match(data = data):
-                    # We currently don't use name or value from the 
-                    # yara results but they can be yielded in the 
-                    # future if necessary. 
-                    for moffset, _name, _value in match.strings:
-                        if moffset < constants.SCAN_BLOCKSIZE:
-                            yield match, moffset + i
+            yield i, to_read
 
             i += constants.SCAN_BLOCKSIZE
 
+    def match_block(self, address_space, i, to_read):
+        """Returns a list of (match, offset) for a single block"""
+        # Read some data and match it.
+        data = address_space.zread(i, to_read)
+        if not data:
+            return []
+
+        hits = []
+        for match in self.rules.match(data = data):
+            # We currently don't use name or value from the 
+            # yara results but they can be yielded in the 
+            # future if necessary. 
+            for moffset, _name, _value in match.strings:
+                if moffset < constants.SCAN_BLOCKSIZE:
+                    hits.append((match, moffset + i))
+        return hits
+
+    def block_has_hits(self, address_space, i, to_read):
+        """Returns whether a block has any matches"""
+        return len(self.match_block(address_space, i, to_read)) > 0
+
+    def scan(self, offset, maxlen):
+        if scan.config.SCAN_WORKERS > 1:
+            # Yara's match objects can't be passed back from the worker
+            # processes, so the workers just report which blocks have
+            # hits and only those blocks are matched again here
+            blocks = list(self.get_blocks(offset, maxlen))
+            results = scan.map_blocks(self.block_has_hits, self.address_space, blocks)
+            blocks = [block for block, has_hits in zip(blocks, results) if has_hits]
+        else:
+            blocks = self.get_blocks(offset, maxlen)
+
+        for i, to_read in blocks:
+            for hit in self.match_block(self.address_space, i, to_read):
+                yield hit
+
 class VadYaraScanner(BaseYaraScanner):
     """A scanner over all memory regions of a process."""
 
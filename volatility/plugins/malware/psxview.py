@@ -21,6 +21,7 @@
 
 import volatility.utils as utils
 import volatility.obj as obj
+import volatility.scan as scan
 import volatility.plugins.common as common
 import volatility.win32.tasks as tasks
 import volatility.plugins.modscan as modscan
@@ -81,16 +82,35 @@ class PsXview(common.AbstractWindowsCommand, sessions.SessionsMixin):
         """Enumerate processes from PsActiveProcessHead"""
         return dict((p.obj_vm.vtop(p.obj_offset), p) for p in all_tasks)
 
-    def check_psscan(self):
+    def scan_pools(self, addr_space):
+        """Scan for process and thread allocations in a single pass
+        over physical memory. Returns a tuple of the _EPROCESS and 
+        _ETHREAD objects found."""
+        flat_space = utils.load_as(self._config, astype = 'physical')
+
+        scanner = scan.FusedPoolScanner([filescan.PoolScanProcess,
+                                         modscan.PoolScanThreadFast])
+        processes = []
+        threads = []
+        for scanner_name, offset in scanner.scan(flat_space):
+            if scanner_name == "PoolScanProcess":
+                processes.append(obj.Object('_EPROCESS', vm = flat_space,
+                                            native_vm = addr_space, offset = offset))
+            else:
+                threads.append(obj.Object('_ETHREAD', vm = flat_space,
+                                          native_vm = addr_space, offset = offset))
+
+        return processes, threads
+
+    def check_psscan(self, processes):
         """Enumerate processes with pool tag scanning"""
-        return dict((p.obj_offset, p)
-                    for p in filescan.PSScan(self._config).calculate())
+        return dict((p.obj_offset, p) for p in processes)
 
-    def check_thrdproc(self, _addr_space):
+    def check_thrdproc(self, threads):
         """Enumerate processes indirectly by ETHREAD scanning"""
         ret = dict()
 
-        for ethread in modscan.ThrdScan(self._config).calculate():
+        for ethread in threads:
             if ethread.ExitTime != 0:
                 continue
             # Bounce back to the threads owner 
@@ -171,8 +191,9 @@ class PsXview(common.AbstractWindowsCommand, sessions.SessionsMixin):
         # are dictionaries whose keys are physical process 
         # offsets and the values are _EPROCESS objects. 
         ps_sources['pslist'] = self.check_pslist(all_tasks)
-        ps_sources['psscan'] = self.check_psscan()
-        ps_sources['thrdproc'] = self.check_thrdproc(addr_space)
+        processes, threads = self.scan_pools(addr_space)
+        ps_sources['psscan'] = self.check_psscan(processes)
+        ps_sources['thrdproc'] = self.check_thrdproc(threads)
         ps_sources['csrss'] = self.check_csrss_handles(all_tasks)
         ps_sources['pspcid'] = self.check_pspcid(addr_space)
         ps_sources['session'] = self.check_sessions(addr_space)
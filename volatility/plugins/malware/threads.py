@@ -377,6 +377,10 @@ class Threads(taskmods.DllList):
 
         for _offset, (found_by_scanner, thread) in seen_threads.items():
 
+            # Read the whole _ETHREAD once, the checks and render_text
+            # look at most of it
+            thread = thread.snapshot()
+
             # Skip processes the user doesn't want to see
             if pidlist and thread.Cid.UniqueProcess not in pidlist:
                 continue
@@ -0,0 +1,64 @@
+# Volatility
+# Copyright (C) 2007-2013 Volatility Foundation
+#
+# This file is part of Volatility.
+#
+# Volatility is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License Version 2 as
+# published by the Free Software Foundation.  You may not use, modify or
+# distribute this program under any other version of the GNU General
+# Public License.
+#
+# Volatility is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Volatility.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+The plugin manifest lists the modules under volatility.plugins that only
+hold data, such as the vtypes and syscall tables for a particular version
+of Windows, and define no classes.
+
+registry.PluginImporter does not import these when it loads the plugins,
+since any one run only needs the handful that match its profile.  Profiles
+and profile modifications fetch them on demand with registry.load_module.
+A module that starts defining classes must be removed from this list.
+"""
+
+data_modules = [
+    'volatility.plugins.gui.vtypes.win7_sp0_x64_vtypes_gui',
+    'volatility.plugins.gui.vtypes.win7_sp0_x86_vtypes_gui',
+    'volatility.plugins.gui.vtypes.win7_sp1_x64_vtypes_gui',
+    'volatility.plugins.gui.vtypes.win7_sp1_x86_vtypes_gui',
+    'volatility.plugins.overlays.windows.vista_sp0_x64_syscalls',
+    'volatility.plugins.overlays.windows.vista_sp0_x64_vtypes',
+    'volatility.plugins.overlays.windows.vista_sp0_x86_syscalls',
+    'volatility.plugins.overlays.windows.vista_sp0_x86_vtypes',
+    'volatility.plugins.overlays.windows.vista_sp12_x64_syscalls',
+    'volatility.plugins.overlays.windows.vista_sp12_x86_syscalls',
+    'volatility.plugins.overlays.windows.vista_sp1_x64_vtypes',
+    'volatility.plugins.overlays.windows.vista_sp1_x86_vtypes',
+    'volatility.plugins.overlays.windows.vista_sp2_x64_vtypes',
+    'volatility.plugins.overlays.windows.vista_sp2_x86_vtypes',
+    'volatility.plugins.overlays.windows.win2003_sp0_x86_syscalls',
+    'volatility.plugins.overlays.windows.win2003_sp0_x86_vtypes',
+    'volatility.plugins.overlays.windows.win2003_sp12_x64_syscalls',
+    'volatility.plugins.overlays.windows.win2003_sp12_x86_syscalls',
+    'volatility.plugins.overlays.windows.win2003_sp1_x64_vtypes',
+    'volatility.plugins.overlays.windows.win2003_sp1_x86_vtypes',
+    'volatility.plugins.overlays.windows.win2003_sp2_x64_vtypes',
+    'volatility.plugins.overlays.windows.win2003_sp2_x86_vtypes',
+    'volatility.plugins.overlays.windows.win7_sp01_x64_syscalls',
+    'volatility.plugins.overlays.windows.win7_sp01_x86_syscalls',
+    'volatility.plugins.overlays.windows.win7_sp0_x64_vtypes',
+    'volatility.plugins.overlays.windows.win7_sp0_x86_vtypes',
+    'volatility.plugins.overlays.windows.win7_sp1_x64_vtypes',
+    'volatility.plugins.overlays.windows.win7_sp1_x86_vtypes',
+    'volatility.plugins.overlays.windows.xp_sp2_x86_syscalls',
+    'volatility.plugins.overlays.windows.xp_sp2_x86_vtypes',
+    'volatility.plugins.overlays.windows.xp_sp3_x86_vtypes',
+    ]
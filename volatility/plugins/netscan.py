@@ -171,6 +171,9 @@ class NetscanObjectClasses(obj.ProfileModification):
 class Netscan(common.AbstractWindowsCommand):
     """Scan a Vista, 2008 or Windows 7 image for connections and sockets"""
 
+    # The pool scanners whose hits are understood by parse_pool_hit
+    scanners = [PoolScanTcpListener, PoolScanTcpEndpoint, PoolScanUdpEndpoint]
+
     @staticmethod
     def is_valid_profile(profile):
         return (profile.metadata.get('os', 'unknown') == 'windows' and
@@ -187,22 +190,32 @@ class Netscan(common.AbstractWindowsCommand):
         if not self.is_valid_profile(kernel_space.profile):
             debug.error("This command does not support the selected profile.")
 
-        # Scan for TCP listeners also known as sockets
-        for offset in PoolScanTcpListener().scan(flat_space):
+        # Find listeners, endpoints and UDP sockets in a single pass 
+        scanner = scan.FusedPoolScanner(self.scanners)
+        for scanner_name, offset in scanner.scan(flat_space):
+            for result in self.parse_pool_hit(scanner_name, offset,
+                                              flat_space, kernel_space):
+                yield result
+
+    @staticmethod
+    def parse_pool_hit(scanner_name, offset, flat_space, kernel_space):
+        """Yields the connections and sockets for an allocation 
+        found by one of the netscan pool scanners"""
+
+        if scanner_name == "PoolScanTcpListener":
 
             tcpentry = obj.Object('_TCP_LISTENER', offset = offset,
                                   vm = flat_space, native_vm = kernel_space)
 
             # Only accept IPv4 or IPv6
             if tcpentry.AddressFamily not in (AF_INET, AF_INET6):
-                continue
+                return
 
             # For TcpL, the state is always listening and the remote port is zero
             for ver, laddr, raddr in tcpentry.dual_stack_sockets():
                 yield tcpentry, "TCP" + ver, laddr, tcpentry.Port, raddr, 0, "LISTENING"
 
-        # Scan for TCP endpoints also known as connections 
-        for offset in PoolScanTcpEndpoint().scan(flat_space):
+        elif scanner_name == "PoolScanTcpEndpoint":
 
             tcpentry = obj.Object('_TCP_ENDPOINT', offset = offset,
                                   vm = flat_space, native_vm = kernel_space)
@@ -212,27 +225,26 @@ class Netscan(common.AbstractWindowsCommand):
             elif tcpentry.AddressFamily == AF_INET6:
                 proto = "TCPv6"
             else:
-                continue
+                return
 
             # These are our sanity checks 
             if (tcpentry.State.v() not in tcpip_vtypes.TCP_STATE_ENUM or
                     (not tcpentry.LocalAddress and (not tcpentry.Owner or
                     tcpentry.Owner.UniqueProcessId == 0 or
                     tcpentry.Owner.UniqueProcessId > 65535))):
-                continue
+                return
 
             yield tcpentry, proto, tcpentry.LocalAddress, tcpentry.LocalPort, \
                     tcpentry.RemoteAddress, tcpentry.RemotePort, tcpentry.State
 
-        # Scan for UDP endpoints 
-        for offset in PoolScanUdpEndpoint().scan(flat_space):
+        elif scanner_name == "PoolScanUdpEndpoint":
 
             udpentry = obj.Object('_UDP_ENDPOINT', offset = offset,
                                   vm = flat_space, native_vm = kernel_space)
 
             # Only accept IPv4 or IPv6
             if udpentry.AddressFamily not in (AF_INET, AF_INET6):
-                continue
+                return
 
             # For UdpA, the state is always blank and the remote end is asterisks
             for ver, laddr, _ in udpentry.dual_stack_sockets():
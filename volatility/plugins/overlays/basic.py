@@ -67,7 +67,7 @@ class String(obj.BaseObject):
 
         Note: to get a null terminated string, use the __str__ method.
         """
-        result = self.obj_vm.zread(self.obj_offset, self.length)
+        result = self.obj_zread(self.obj_offset, self.length)
         if not result:
             return obj.NoneObject("Cannot read string length {0} at {1:#x}".format(self.length, self.obj_offset))
         return result
@@ -29,6 +29,8 @@
 import os, struct, socket
 import copy
 import zipfile
+import bisect
+import cPickle as pickle
 
 import volatility.plugins
 import volatility.plugins.overlays.basic as basic
@@ -161,6 +163,89 @@ def parse_system_map(data, module):
  
     return arch, mem_model, sys_map
 
+def system_map_arch(data):
+    """Returns the architecture and memory model that parse_system_map 
+    would find for the symbol file, without building the symbol table"""
+    arch = "x86"
+    if "arm_syscall" in data:
+        for line in data.splitlines():
+            if not "arm_syscall" in line:
+                continue
+            fields = line.strip().split()
+            if len(fields) != 3 or fields[2] != "arm_syscall":
+                continue
+            try:
+                long(fields[0], 16)
+            except ValueError:
+                continue
+            arch = "ARM"
+            break
+
+    # The memory model comes from the width of the last address
+    mem_model = "32bit"
+    for line in reversed(data.splitlines()):
+        fields = line.strip().split()
+        if len(fields) == 3:
+            mem_model = str(len(fields[0]) * 4) + "bit"
+            break
+
+    if mem_model == "64bit" and arch == "x86":
+        arch = "x64"
+
+    return arch, mem_model
+
+## Bump this whenever the layout of the profile cache files changes
+PROFILE_CACHE_VERSION = 1
+
+def profile_cache_header(zippath, dwarfname, sysmapname):
+    """Returns the header that a profile cache for the zip must start with"""
+    stat = os.stat(zippath)
+    return dict(version = PROFILE_CACHE_VERSION, size = stat.st_size, mtime = stat.st_mtime,
+                dwarf = dwarfname, sysmap = sysmapname)
+
+def read_profile_cache(zippath, dwarfname, sysmapname, body = False):
+    """Reads the cache file kept next to a profile zip
+
+       The cache holds two pickles, a small header and then the body
+       with the parsed vtypes and system map, so that reading just the
+       header at startup is cheap.  Returns the header (or the header 
+       and body if body is True), or None if the cache is missing, does
+       not match the zip or only holds the header when the body is wanted.
+    """
+    try:
+        expected = profile_cache_header(zippath, dwarfname, sysmapname)
+        with open(zippath + ".cache", "rb") as f:
+            header = pickle.load(f)
+            if not isinstance(header, dict) or \
+                any(header.get(k) != v for k, v in expected.items()):
+                return None
+            if not body:
+                return header
+            return header, pickle.load(f)
+    except (IOError, OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+
+def write_profile_cache(zippath, header, body = None):
+    """Writes the cache file for a profile zip, if its directory is writable
+
+       Without a body only the header is written, which is enough for 
+       startup; the body is added when the profile is first used.
+    """
+    filename = zippath + ".cache"
+    tmpname = filename + ".tmp." + str(os.getpid())
+    try:
+        with open(tmpname, "wb") as f:
+            pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+            if body is not None:
+                pickle.dump(body, f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmpname, filename)
+    except (IOError, OSError), e:
+        debug.debug("Unable to write profile cache {0}: {1}".format(filename, e))
+        try:
+            os.remove(tmpname)
+        except OSError:
+            pass
+
 def LinuxProfileFactory(profpkg):
     """ Takes in a zip file, spits out a LinuxProfile class
 
@@ -169,29 +254,43 @@ def LinuxProfileFactory(profpkg):
 
         To generate a suitable dwarf file:
         dwarfdump -di vmlinux > output.dwarf
+
+        Only the architecture and memory model are needed up front, and
+        they come from the cache file next to the zip when it is current.
+        The dwarf and system map data are only parsed when the profile is
+        instantiated (and then cached for next time).
     """
 
-    dwarfdata = None
-    sysmapdata = None
+    dwarfname = None
+    sysmapname = None
 
     #  XXX Do we want to initialize this
     memmodel, arch = "32bit", "x86"
-    profilename = os.path.splitext(os.path.basename(profpkg.filename))[0]
+    zippath = profpkg.filename
+    profilename = os.path.splitext(os.path.basename(zippath))[0]
 
     for f in profpkg.filelist:
         if f.filename.lower().endswith('.dwarf'):
-            dwarfdata = profpkg.read(f.filename)
+            dwarfname = f.filename
         elif 'system.map' in f.filename.lower():
-            sysmapdata = profpkg.read(f.filename)
-            arch, memmodel, sysmap = parse_system_map(profpkg.read(f.filename), "kernel")
-
-    if memmodel == "64bit":
-        arch = "x64"
+            sysmapname = f.filename
 
-    if not sysmapdata or not dwarfdata:
+    if not sysmapname or not dwarfname:
         # Might be worth throwing an exception here?
         return None
 
+    header = read_profile_cache(zippath, dwarfname, sysmapname)
+    if header:
+        arch, memmodel = header['arch'], header['memmodel']
+    else:
+        arch, memmodel = system_map_arch(profpkg.read(sysmapname))
+        header = profile_cache_header(zippath, dwarfname, sysmapname)
+        header.update(arch = arch, memmodel = memmodel)
+        write_profile_cache(zippath, header)
+
+    if memmodel == "64bit":
+        arch = "x64"
+
     class AbstractLinuxProfile(obj.Profile):
         __doc__ = "A Profile for Linux " + profilename + " " + arch
         _md_os = "linux"
@@ -204,11 +303,14 @@ def LinuxProfileFactory(profpkg):
         def __init__(self, *args, **kwargs):
             # change the name to catch any code referencing the old hash table
             self.sys_map = {}
+            self._symbol_index = {}
+            self._profile_data = None
             obj.Profile.__init__(self, *args, **kwargs)
 
         def clear(self):
             """Clear out the system map, and everything else"""
             self.sys_map = {}
+            self._symbol_index = {}
             obj.Profile.clear(self)
 
         def reset(self):
@@ -216,6 +318,8 @@ def LinuxProfileFactory(profpkg):
             self.clear()
             self.load_vtypes()
             self.load_sysmap()
+            # Only hold on to the parsed data while it's being loaded
+            self._profile_data = None
             self.load_modifications()
             self.compile()
 
@@ -246,22 +350,63 @@ def LinuxProfileFactory(profpkg):
                 pdb.set_trace()
                 raise exceptions.VolatilityException("Inconsistent linux profile - unable to look up " + str(e))
 
+        def _get_profile_data(self):
+            """Returns the parsed vtypes and system map for the profile
+
+               These come from the cache next to the zip when it is current,
+               otherwise the dwarf and system map files are parsed and the 
+               cache is rewritten.
+            """
+            if self._profile_data is None:
+                cached = read_profile_cache(zippath, dwarfname, sysmapname, body = True)
+                if cached:
+                    self._profile_data = cached[1]
+                    debug.debug("{0}: Loaded vtypes and system map from {1}.cache".format(profilename, zippath))
+                else:
+                    profpkg = zipfile.ZipFile(zippath)
+                    vtypesvar = dwarf.DWARFParser(profpkg.read(dwarfname)).finalize()
+                    self._merge_anonymous_members(vtypesvar)
+                    debug.debug("{2}: Found dwarf file {0} with {1} symbols".format(dwarfname, len(vtypesvar.keys()), profilename))
+
+                    sysarch, sysmemmodel, sysmapvar = parse_system_map(profpkg.read(sysmapname), "kernel")
+                    debug.debug("{2}: Found system file {0} with {1} symbols".format(sysmapname, len(sysmapvar.keys()), profilename))
+                    profpkg.close()
+
+                    self._profile_data = dict(vtypes = vtypesvar, sys_map = sysmapvar)
+                    header = profile_cache_header(zippath, dwarfname, sysmapname)
+                    header.update(arch = sysarch, memmodel = sysmemmodel)
+                    write_profile_cache(zippath, header, self._profile_data)
+            return self._profile_data
+
         def load_vtypes(self):
             """Loads up the vtypes data"""
             ntvar = self.metadata.get('memory_model', '32bit')
             self.native_types = copy.deepcopy(self.native_mapping.get(ntvar))
 
-            vtypesvar = dwarf.DWARFParser(dwarfdata).finalize()
-            self._merge_anonymous_members(vtypesvar)
-            self.vtypes.update(vtypesvar)
-            debug.debug("{2}: Found dwarf file {0} with {1} symbols".format(f.filename, len(vtypesvar.keys()), profilename))
+            self.vtypes.update(self._get_profile_data()['vtypes'])
 
         def load_sysmap(self):
             """Loads up the system map data"""
-            arch, _memmodel, sysmapvar = parse_system_map(sysmapdata, "kernel")
-            debug.debug("{2}: Found system file {0} with {1} symbols".format(f.filename, len(sysmapvar.keys()), profilename))
+            self.sys_map.update(self._get_profile_data()['sys_map'])
+            self._symbol_index = {}
+
+        def _get_symbol_index(self, module):
+            """Returns the symbol index for a module, building it on first use
 
-            self.sys_map.update(sysmapvar)
+               The index is a sorted list of the module's symbol addresses
+               and a dict mapping each address to the last symbol name
+               seen at it, matching what a walk of the whole system map
+               would return, so lookups by address don't need one.
+            """
+            index = self._symbol_index.get(module)
+            if index is None:
+                names = {}
+                for (name, addrs) in self.sys_map[module].items():
+                    for (addr, _addr_type) in addrs:
+                        names[addr] = name
+                index = (sorted(names.keys()), names)
+                self._symbol_index[module] = index
+            return index
 
         def get_all_symbols(self, module = "kernel"):
             """ Gets all the symbol tuples for the given module """
@@ -286,31 +431,15 @@ def LinuxProfileFactory(profpkg):
 
             # returns a hash table for quick looks
             # the main use of this function is to see if an address is known
-            ret = {}
-
-            symbols = self.get_all_symbols(module)
-
-            for sym in symbols:
-
-                for (addr, addrtype) in sym:
-                    ret[addr] = 1
+            if module not in self.sys_map:
+                debug.info("All symbols requested for non-existent module %s" % module)
+                return {}
 
-            return ret
+            # A copy, so callers can't change the index
+            return dict(self._get_symbol_index(module)[1])
 
         def get_symbol_by_address(self, module, sym_address):
-            ret = ""
-            symtable = self.sys_map
-
-            mod = symtable[module]
-
-            for (name, addrs) in mod.items():
-
-                for (addr, addr_type) in addrs:
-                    if sym_address == addr:
-                        ret = name
-                        break
-
-            return ret
+            return self._get_symbol_index(module)[1].get(sym_address, "")
 
         def get_all_symbol_names(self, module = "kernel"):
             symtable = self.sys_map
@@ -334,12 +463,14 @@ def LinuxProfileFactory(profpkg):
             high_addr = 0xffffffffffffffff
             table_addr = self.get_symbol(sym_name, module = module)
 
-            addrs = self.get_all_addresses(module = module)
+            if module not in self.sys_map:
+                return high_addr
 
-            for addr in addrs.keys():
+            addrs = self._get_symbol_index(module)[0]
 
-                if table_addr < addr < high_addr:
-                    high_addr = addr
+            idx = bisect.bisect_right(addrs, table_addr)
+            if idx < len(addrs) and addrs[idx] < high_addr:
+                high_addr = addrs[idx]
 
             return high_addr
 
@@ -461,12 +592,16 @@ class hlist_node(obj.CType):
             # We're a header element and not to be included in the list
             seen.add(self.obj_offset)
 
+        ## Each item is read from its page(s) in one go
+        cache = obj.PageCache(self.obj_vm)
+
         while nxt.is_valid() and nxt.obj_offset not in seen:
             ## Instantiate the object
             item = obj.Object(obj_type, offset = nxt.obj_offset - offset,
                                     vm = self.obj_vm,
                                     parent = self.obj_parent,
                                     name = obj_type)
+            item = cache.snapshot(item)
 
             seen.add(nxt.obj_offset)
 
@@ -504,12 +639,16 @@ class list_head(obj.CType):
             # We're a header element and not to be included in the list
             seen.add(self.obj_offset)
 
+        ## Each item is read from its page(s) in one go
+        cache = obj.PageCache(self.obj_vm)
+
         while nxt.is_valid() and nxt.obj_offset not in seen:
             ## Instantiate the object
             item = obj.Object(obj_type, offset = nxt.obj_offset - offset,
                                     vm = self.obj_vm,
                                     parent = self.obj_parent,
                                     name = obj_type)
+            item = cache.snapshot(item)
 
             seen.add(nxt.obj_offset)
 
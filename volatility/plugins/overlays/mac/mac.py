@@ -416,12 +416,15 @@ class rtentry(obj.CType):
 class queue_entry(obj.CType):
 
     def walk_list(self, list_head):
+        cache = obj.PageCache(self.obj_vm)
         n = self.next.dereference_as("task")
         while n and n.obj_offset != list_head:
+            n = cache.snapshot(n)
             yield n
             n = n.tasks.next.dereference_as("task")
         p = self.prev.dereference_as("task")
         while p and p.obj_offset != list_head:
+            p = cache.snapshot(p)
             yield p
             p = p.tasks.prev.dereference_as("task")
 
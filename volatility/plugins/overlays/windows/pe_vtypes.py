@@ -20,6 +20,7 @@
 
 import volatility.exceptions as exceptions
 import volatility.obj as obj
+import volatility.cache as cache
 
 pe_vtypes = {
     '_IMAGE_EXPORT_DIRECTORY': [ 0x28, {
@@ -174,8 +175,8 @@ class _IMAGE_EXPORT_DIRECTORY(obj.CType):
             if (func_rva >= exp_dir.VirtualAddress and
                     func_rva < exp_dir.VirtualAddress + exp_dir.Size):
                 n = self._name(func_rva)
-                f = obj.NoneObject("Ordinal function {0} in module {1} forwards to {2}".format(
-                                   ordinal, self.obj_parent.BaseDllName, n))
+                f = obj.NoneObject("Ordinal function {0} in module {1} forwards to {2}",
+                                   reason_args = (ordinal, self.obj_parent.BaseDllName, n))
             else:
                 n = self._name(name_rva)
                 f = func_rva
@@ -295,6 +296,38 @@ class _IMAGE_IMPORT_DESCRIPTOR(obj.CType):
                         )
         return data.count(chr(0)) == len(data)
 
+class PEExportIndex(object):
+    """
+    The exported functions of a PE, for repeated lookups.
+
+    exports is a list of (Ordinal, FunctionRVA, Name) like
+    _LDR_DATA_TABLE_ENTRY.exports() yields, except that Name is a string
+    ('' if it is paged) and FunctionRVA is None for forwarded functions.
+    """
+
+    def __init__(self, rows):
+        self.exports = [tuple(row) for row in rows]
+
+        self.rvas = {}
+        for _, rva, name in self.exports:
+            if name not in self.rvas:
+                self.rvas[name] = rva
+
+    def getprocaddress(self, func):
+        """Return the RVA of func, or None"""
+        return self.rvas.get(func)
+
+## Export indexes by the image and address space they come from,
+## shared by everything that looks up symbols in the same modules
+pe_indexes = {}
+pe_indexes_size = 512
+
+def _int_or_none(value):
+    """Return value as an integer, or None for None and NoneObjects"""
+    if value == None:
+        return None
+    return int(value)
+
 class _LDR_DATA_TABLE_ENTRY(obj.CType):
     """
     Class for PE file / modules
@@ -366,10 +399,68 @@ class _LDR_DATA_TABLE_ENTRY(obj.CType):
 
     def getprocaddress(self, func):
         """Return the RVA of func"""
-        for _, f, n in self.exports():
-            if str(n or '') == func:
-                return f
-        return None
+        return self.export_index().getprocaddress(func)
+
+    def _index_key(self):
+        """
+        Return a key naming this PE image in this address space, made of
+        the address space's type, DTB and image file with the DllBase,
+        TimeDateStamp and CheckSum. Returns None if the PE header cannot
+        be read.
+        """
+        nt_header = self._nt_header()
+        if nt_header == None:
+            return None
+
+        timestamp = nt_header.FileHeader.TimeDateStamp
+        checksum = nt_header.OptionalHeader.CheckSum
+        if timestamp == None or checksum == None:
+            return None
+
+        vm = self.obj_native_vm
+        bottom = vm
+        while getattr(bottom, "base", None) is not None:
+            bottom = bottom.base
+
+        return (vm.__class__.__name__, getattr(vm, "dtb", None), getattr(bottom, "name", None),
+                int(self.DllBase), int(timestamp), int(checksum))
+
+    def _cached_index(self, kind, build_rows, make_index):
+        """
+        Return make_index(rows) for the index of the given kind, from the
+        shared indexes or else built from rows found in the cache directory
+        (if caching is enabled) or returned by build_rows, which are then
+        saved there.
+        """
+        key = self._index_key()
+        if key is None:
+            return make_index(build_rows())
+
+        try:
+            return pe_indexes[kind, key]
+        except KeyError:
+            pass
+
+        path = "pe_index/{0}/{1}-{2}/{3:x}-{4:x}-{5:x}".format(kind, key[0], key[1] or 0, *key[3:])
+        node = cache.CACHE[path]
+        rows = node and node.get_payload()
+        if rows is None:
+            rows = build_rows()
+            if node:
+                node.set_payload(rows)
+                node.dump()
+
+        if len(pe_indexes) >= pe_indexes_size:
+            pe_indexes.clear()
+        index = pe_indexes[kind, key] = make_index(rows)
+        return index
+
+    def export_index(self):
+        """Return a PEExportIndex of the PE's exported functions"""
+        return self._cached_index("exports",
+                    lambda: [(int(o), _int_or_none(f), str(n or ''))
+                             for o, f, n in self.exports()],
+                    PEExportIndex)
 
     def imports(self):
         """
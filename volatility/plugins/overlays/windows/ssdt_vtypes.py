@@ -18,9 +18,9 @@
 # along with Volatility.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import sys
 import volatility.debug as debug
 import volatility.obj as obj
+import volatility.registry as registry
 
 # SSDT structures for all x86 profiles *except* Win 2003 Server
 ssdt_vtypes = {
@@ -73,7 +73,7 @@ class WinSyscallsAttribute(obj.ProfileModification):
 class AbstractSyscalls(obj.ProfileModification):
     syscall_module = 'No default'
     def modification(self, profile):
-        module = sys.modules.get(self.syscall_module, None)
+        module = registry.load_module(self.syscall_module)
         profile.additional['syscalls'] = module.syscalls
 
 class WinXPSyscalls(AbstractSyscalls):
@@ -226,6 +226,9 @@ class _LIST_ENTRY(obj.CType):
             # We're a header element and not to be included in the list
             seen.add(self.obj_offset)
 
+        ## Each item is read from its page(s) in one go
+        cache = obj.PageCache(self.obj_vm)
+
         while nxt.is_valid() and nxt.obj_offset not in seen:
             ## Instantiate the object
             item = obj.Object(type, offset = nxt.obj_offset - offset,
@@ -233,6 +236,7 @@ class _LIST_ENTRY(obj.CType):
                                     parent = self.obj_parent,
                                     native_vm = self.obj_native_vm,
                                     name = type)
+            item = cache.snapshot(item)
 
             seen.add(nxt.obj_offset)
 
@@ -643,26 +647,29 @@ class _MMVAD_SHORT(obj.CType):
                 self.Start < obj.VolMagic(self.obj_vm).MaxAddress.v() and
                 self.End < (obj.VolMagic(self.obj_vm).MaxAddress.v() << 12))
 
-    def traverse(self, visited = None):
+    def traverse(self, visited = None, cache = None):
         """ Traverse the VAD tree by generating all the left items,
         then the right items.
 
         We try to be tolerant of cycles by storing all offsets visited.
+        The nodes are read through a page cache shared by the whole walk.
         """
         if visited == None:
             visited = set()
+        if cache == None:
+            cache = obj.PageCache(self.obj_vm)
 
         ## We try to prevent loops here
         if self.obj_offset in visited:
             return
 
-        yield self
+        yield cache.snapshot(self)
 
-        for c in self.LeftChild.traverse(visited = visited):
+        for c in self.LeftChild.traverse(visited = visited, cache = cache):
             visited.add(c.obj_offset)
             yield c
 
-        for c in self.RightChild.traverse(visited = visited):
+        for c in self.RightChild.traverse(visited = visited, cache = cache):
             visited.add(c.obj_offset)
             yield c
 
@@ -31,6 +31,8 @@
 # from volatility.win32.datetime import windows_to_unix_time
 import volatility.win32.hive as hivemod
 import volatility.win32.rawreg as rawreg
+import volatility.win32.regindex as regindex
+import volatility.obj as obj
 import volatility.debug as debug
 import volatility.utils as utils
 import volatility.commands as commands
@@ -61,16 +63,15 @@ class PrintKey(hivelist.HiveList):
                           help = 'Registry Key', type = 'str')
 
     def hive_name(self, hive):
-        try:
-            return hive.FileFullPath.v() or hive.FileUserName.v() or hive.HiveRootPath.v() or "[no name]"
-        except AttributeError:
-            return "[no name]"
+        return regindex.hive_name(hive)
 
     def calculate(self):
         addr_space = utils.load_as(self._config)
+        index = regindex.RegistryIndex(self._config)
 
         if not self._config.HIVE_OFFSET:
-            hive_offsets = [(self.hive_name(h), h.obj_offset) for h in hivelist.HiveList.calculate(self)]
+            hives = index.hives(lambda: hivelist.HiveList.calculate(self))
+            hive_offsets = [(name, offset) for offset, name in hives]
         else:
             hive_offsets = [("User Specified", self._config.HIVE_OFFSET)]
 
@@ -82,7 +83,13 @@ class PrintKey(hivelist.HiveList):
                     debug.error("Unable to find root key. Is the hive offset correct?")
             else:
                 if self._config.KEY:
-                    yield name, rawreg.open_key(root, self._config.KEY.split('\\'))
+                    key = self._config.KEY.split('\\')
+                    keys = index.keys(hoff)
+                    cell = keys and keys.find_cell(key)
+                    if cell:
+                        yield name, obj.Object("_CM_KEY_NODE", cell, h)
+                    else:
+                        yield name, rawreg.open_key(root, key)
                 else:
                     yield name, root
 
@@ -28,8 +28,10 @@
 
 import volatility.win32.hive as hivemod
 import volatility.win32.rawreg as rawreg
+import volatility.win32.regindex as regindex
 import volatility.win32.hashdump as hashdump
 import volatility.utils as utils
+import volatility.obj as obj
 import volatility.plugins.registry.hivelist as hl
 from heapq import nlargest
 
@@ -42,8 +44,20 @@ class RegistryApi(object):
         self.addr_space = utils.load_as(self._config)
         self.all_offsets = {}
         self.current_offsets = {}
+        self.hive_spaces = {}
+        self.index = regindex.RegistryIndex(self._config)
         self.populate_offsets()
 
+    def get_hive(self, offset):
+        '''
+        get the address space of the hive at offset, which we keep so that 
+        keys already looked up in it are found again straight away
+        '''
+        h = self.hive_spaces.get(offset)
+        if h is None:
+            h = self.hive_spaces[offset] = hivemod.HiveAddressSpace(self.addr_space, self._config, offset)
+        return h
+
     def print_offsets(self):
         '''
         this is just in case we want to check our offsets and which hive(s) was/were chosen
@@ -57,18 +71,23 @@ class RegistryApi(object):
         '''
         get all hive offsets so we don't have to scan again...
         '''
-        hive_offsets = []
-        hiveroot = hl.HiveList(self._config).calculate()
+        for offset, name in self.index.hives(hl.HiveList(self._config).calculate):
+            self.all_offsets[offset] = name
 
-        for hive in hiveroot:
-            if hive.obj_offset not in hive_offsets:
-                hive_offsets.append(hive.obj_offset)
-                try:
-                    name = hive.FileFullPath.v() or hive.FileUserName.v() or hive.HiveRootPath.v() or "[no name]"
-                # What exception are we expecting here?
-                except:
-                    name = "[no name]"
-                self.all_offsets[hive.obj_offset] = name
+    def open_key(self, offset, key):
+        '''
+        open the key at the path key (a list of names) in the hive at offset, 
+        straight from the registry index if the hive has been indexed
+        '''
+        h = self.get_hive(offset)
+        index = self.index.keys(offset)
+        cell = index and index.find_cell(key)
+        if cell:
+            return obj.Object("_CM_KEY_NODE", cell, h)
+        root = rawreg.get_root(h)
+        if root != None:
+            return rawreg.open_key(root, key)
+        return None
 
     def reg_get_currentcontrolset(self, fullname = True):
         '''
@@ -80,7 +99,7 @@ class RegistryApi(object):
         for offset in self.all_offsets:
             name = self.all_offsets[offset] + " "
             if name.lower().find("\\system ") != -1:
-                sysaddr = hivemod.HiveAddressSpace(self.addr_space, self._config, offset)
+                sysaddr = self.get_hive(offset)
                 if fullname:
                     return "ControlSet00{0}".format(hashdump.find_control_set(sysaddr))
                 else:
@@ -131,14 +150,11 @@ class RegistryApi(object):
         if key:
             for offset in self.current_offsets:
                 if given_root == None:
-                    h = hivemod.HiveAddressSpace(self.addr_space, self._config, offset)
-                    root = rawreg.get_root(h)
+                    k = self.open_key(offset, key.split('\\'))
                 else:
-                    root = given_root
-                if root != None:
-                    k = rawreg.open_key(root, key.split('\\'))
-                    if k:
-                        return k
+                    k = rawreg.open_key(given_root, key.split('\\'))
+                if k:
+                    return k
         return None
 
     def reg_yield_key(self, hive_name, key, user = None, given_root = None):
@@ -153,14 +169,11 @@ class RegistryApi(object):
             for offset in self.current_offsets:
                 name = self.current_offsets[offset]
                 if given_root == None:
-                    h = hivemod.HiveAddressSpace(self.addr_space, self._config, offset)
-                    root = rawreg.get_root(h)
+                    k = self.open_key(offset, key.split('\\'))
                 else:
-                    root = given_root
-                if root != None:
-                    k = rawreg.open_key(root, key.split('\\'))
-                    if k:
-                        yield k, name
+                    k = rawreg.open_key(given_root, key.split('\\'))
+                if k:
+                    yield k, name
 
     def reg_enum_key(self, hive_name, key, user = None):
         '''
@@ -201,6 +214,12 @@ class RegistryApi(object):
         '''
         if key and value:
             h = given_root if given_root != None else self.reg_get_key(hive_name, key)
+            if h != None and given_root == None:
+                # Don't read the values if the index knows it isn't there
+                index = self.index.keys(h.obj_vm.hive.obj_offset)
+                names = index and index.value_names(regindex.key_cell(h))
+                if names is not None and value not in names:
+                    return None
             if h != None:
                 for v in rawreg.values(h):
                     if value == v.Name:
@@ -222,61 +241,50 @@ class RegistryApi(object):
         This function enumerates all keys in specified hives and 
         collects lastwrite times.
         '''
-        keys = []
         if self.all_offsets == {}:
             self.populate_offsets()
         if self.current_offsets == {}:
             self.set_current(hive_name, user)
 
+        if self.index.enabled:
+            keys = self.index.all_keys(self.current_offsets, self.get_hive)
+        else:
+            keys = self.walk_all_keys()
+
+        for lastwrite, reg_name, name in keys:
+            time = "{0}".format(lastwrite) if not rawtime else lastwrite
+            if (start and end and str(time) >= start and str(time) <= end) or (start == None and end == None):
+                if reg:
+                    yield (time, reg_name, name)
+                else:
+                    yield (time, name)
+
+    def walk_all_keys(self):
+        '''
+        walks the current hives, yielding the lastwrite time, hive name and 
+        name of the root keys, then of each level of subkeys in turn
+        '''
+        keys = []
+
         # Collect the root keys 
         for offset in self.current_offsets:
             reg_name = self.current_offsets[offset]
-            h = hivemod.HiveAddressSpace(self.addr_space, self._config, offset)
+            h = self.get_hive(offset)
             root = rawreg.get_root(h)
             if not root:
                 pass
             else:
-                time = "{0}".format(root.LastWriteTime) if not rawtime else root.LastWriteTime
-                if reg:
-                    if start and end and str(time) >= start and str(time) <= end:
-                        yield (time, reg_name, root.Name)
-                    elif start == None and end == None:
-                        yield (time, reg_name, root.Name)
-                else:
-                    if start and end and str(time) >= start and str(time) <= end:
-                        yield (time, root.Name)
-                    elif start == None and end == None:
-                        yield (time, root.Name)
+                yield (root.LastWriteTime, reg_name, root.Name)
                 for s in rawreg.subkeys(root):
-                    if reg:
-                        keys.append([s, reg_name, root.Name + "\\" + s.Name])
-                    else:
-                        keys.append([s, root.Name + "\\" + s.Name])
+                    keys.append([s, reg_name, root.Name + "\\" + s.Name])
 
         # Get subkeys
-        if reg:
-            for k, reg_name, name in keys:
-                time = "{0}".format(k.LastWriteTime) if not rawtime else k.LastWriteTime
-                if start and end and str(time) >= start and str(time) <= end:
-                    yield (time, reg_name, name)
-                elif start == None and end == None:
-                    yield (time, reg_name, name)
-                for s in rawreg.subkeys(k):
-                    if name and s.Name:
-                        item = name + '\\' + s.Name
-                        keys.append([s, reg_name, item])
-        else:
-            for k, name in keys:
-                time = "{0}".format(k.LastWriteTime) if not rawtime else k.LastWriteTime
-                if start and end and str(time) >= start and str(time) <= end:
-                    yield (time, name)
-                elif start == None and end == None:
-                    yield (time, name)
-
-                for s in rawreg.subkeys(k):
-                    if name and s.Name:
-                        item = name + '\\' + s.Name
-                        keys.append([s, item])
+        for k, reg_name, name in keys:
+            yield (k.LastWriteTime, reg_name, name)
+            for s in rawreg.subkeys(k):
+                if name and s.Name:
+                    item = name + '\\' + s.Name
+                    keys.append([s, reg_name, item])
 
     def reg_get_last_modified(self, hive_name, count = 1, user = None, start = None, end = None, reg = False):
         '''
@@ -182,14 +182,16 @@ class SSDT(common.AbstractWindowsCommand):
         # Print out the entries for each table
         for idx, table, n, vm, mods, mod_addrs in data:
             outfd.write("SSDT[{0}] at {1:x} with {2} entries\n".format(idx, table, n))
+            # Decode the whole table at once. These are absolute function addresses 
+            # in kernel memory on x86. They must be signed long for x64 because they 
+            # are RVAs relative to the base of the table and can be negative. 
+            entries = obj.Object('Array', offset = table, vm = vm, count = n,
+                                 targetType = 'address' if bits32 else 'long').values()
             for i in range(n):
                 if bits32:
-                    # These are absolute function addresses in kernel memory. 
-                    syscall_addr = obj.Object('address', table + (i * 4), vm).v()
+                    syscall_addr = entries[i]
                 else:
-                    # These must be signed long for x64 because they are RVAs relative
-                    # to the base of the table and can be negative. 
-                    offset = obj.Object('long', table + (i * 4), vm).v()
+                    offset = entries[i]
                     # The offset is the top 20 bits of the 32 bit number. 
                     syscall_addr = table + (offset >> 4)
                 try:
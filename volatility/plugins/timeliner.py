@@ -44,6 +44,7 @@ import volatility.win32.rawreg as rawreg
 import volatility.addrspace as addrspace
 import volatility.win32.tasks as tasks
 import volatility.utils as utils
+import volatility.scan as scan
 import volatility.protos as protos
 import os, sys
 import struct
@@ -130,8 +131,20 @@ class TimeLiner(dlldump.DLLDump, procdump.ProcExeDump, userassist.UserAssist):
             event = "0|[END LIVE RESPONSE]|0|---------------|0|0|0|{0}|{0}|{0}|{0}\n".format(im['ImageDatetime'].v())
         yield event
                 
+        # Find processes, threads and (on Vista+) network objects in a 
+        # single pass over physical memory
+        flat_space = utils.load_as(self._config, astype = 'physical')
+        scanners = [filescan.PoolScanProcess, modscan.PoolScanThreadFast]
+        if addr_space.profile.metadata.get('major', 0) != 5:
+            scanners += netscan.Netscan.scanners
+
+        pool_hits = {}
+        for scanner_name, offset in scan.FusedPoolScanner(scanners).scan(flat_space):
+            pool_hits.setdefault(scanner_name, []).append(offset)
+
         # Get EPROCESS 
-        psscan = filescan.PSScan(self._config).calculate()
+        psscan = [obj.Object('_EPROCESS', vm = flat_space, native_vm = addr_space, offset = offset)
+                  for offset in pool_hits.get("PoolScanProcess", [])]
         for eprocess in psscan:
             if eprocess.obj_offset not in offsets:
                 offsets.append(eprocess.obj_offset)
@@ -193,7 +206,12 @@ class TimeLiner(dlldump.DLLDump, procdump.ProcExeDump, userassist.UserAssist):
                     yield line
         else:
             # Vista+
-            nets = netscan.Netscan(self._config).calculate()
+            net_hits = sorted((offset, scanner.__name__)
+                              for scanner in netscan.Netscan.scanners
+                              for offset in pool_hits.get(scanner.__name__, []))
+            nets = [net for offset, scanner_name in net_hits
+                    for net in netscan.Netscan.parse_pool_hit(scanner_name, offset,
+                                                              flat_space, addr_space)]
             for net_object, proto, laddr, lport, raddr, rport, state in nets:
                 conn = "{0}:{1} -> {2}:{3}".format(laddr, lport, raddr, rport)
                 if not body:
@@ -215,7 +233,8 @@ class TimeLiner(dlldump.DLLDump, procdump.ProcExeDump, userassist.UserAssist):
                 yield line
 
         # Get threads
-        threads = modscan.ThrdScan(self._config).calculate()
+        threads = [obj.Object('_ETHREAD', vm = flat_space, native_vm = addr_space, offset = offset)
+                   for offset in pool_hits.get("PoolScanThreadFast", [])]
         for thread in threads:
             image = pids.get(thread.Cid.UniqueProcess.v(), "UNKNOWN")
             if not body:
@@ -43,9 +43,23 @@ functionality. For example we may include a Scanner, Report and File
 classes in the same plugin and have them all automatically loaded.
 """
 
-import os, zipfile
+import os, sys, zipfile
 import volatility.debug as debug
 import volatility.plugins as plugins
+import volatility.plugins.manifest as manifest
+
+def load_module(name):
+    """Returns the named module, importing it first if necessary
+
+       Modules in the plugin manifest's data_modules are not imported at
+       startup, so code that needs one should fetch it through here
+       rather than from sys.modules.
+    """
+    module = sys.modules.get(name, None)
+    if module is None:
+        __import__(name)
+        module = sys.modules[name]
+    return module
 
 class PluginImporter(object):
     """This class searches through a comma-separated list of plugins and
@@ -111,9 +125,11 @@ class PluginImporter(object):
                         yield fn[len(prefix):]
 
     def run_imports(self):
-        """Imports all the already found modules"""
+        """Imports all the already found modules, except for the data 
+           modules in the manifest which are loaded on demand"""
+        data_modules = set(manifest.data_modules)
         for i in self.modnames.keys():
-            if self.modnames[i] is not None:
+            if self.modnames[i] is not None and i not in data_modules:
                 try:
                     __import__(i)
                 except Exception, e:
@@ -141,7 +157,7 @@ def get_plugin_classes(cls, showall = False, lower = False):
     for plugin in set(_get_subclasses(cls)):
         if showall or not (plugin.__name__.startswith("Abstract") or plugin == cls):
             # FIXME: This is due to not having done things correctly at the start
-            if not showall and plugin.__name__ in ['BufferAddressSpace', 'HiveFileAddressSpace', 'HiveAddressSpace']:
+            if not showall and plugin.__name__ in ['BufferAddressSpace', 'HiveFileAddressSpace', 'HiveAddressSpace', 'PageCacheAddressSpace']:
                 continue
             name = plugin.__name__.split('.')[-1]
             if lower:
@@ -33,12 +33,174 @@
 @contact:      awalters@4tphi.net
 @organization: Volatility Foundation
 """
+import os
+import re
+import cPickle as pickle
+import multiprocessing
 import volatility.debug as debug
 import volatility.registry as registry
 import volatility.addrspace as addrspace
 import volatility.constants as constants
 import volatility.conf as conf
 
+try:
+    import ahocorasick #pylint: disable-msg=F0401
+    has_ahocorasick = True
+except ImportError:
+    has_ahocorasick = False
+
+config = conf.ConfObject()
+
+config.add_option("SCAN-WORKERS", default = 1, type = 'int',
+                  cache_invalidator = False,
+                  help = "Number of processes used to scan address spaces in parallel")
+
+########### Parallel scanning splits an address space into blocks and
+########### hands them to a pool of forked workers. Each worker reopens
+########### the address space from its pickled state so that no file
+########### handles are shared with the parent.
+
+## These are set in the parent before the pool forks, and inherited by the workers
+_worker_function = None
+_worker_address_space = None
+
+def _init_worker(pickled_address_space):
+    global _worker_address_space
+    _worker_address_space = pickle.loads(pickled_address_space)
+
+def _run_worker(block):
+    block_offset, block_length = block
+    return _worker_function(_worker_address_space, block_offset, block_length)
+
+def map_blocks(function, address_space, blocks):
+    """ A generator of function(address_space, block_offset, block_length)
+    for each (block_offset, block_length) in blocks, in the same order.
+
+    If --scan-workers is more than one, the calls are made from a pool
+    of worker processes, so function's results must be picklable. The
+    function (and anything it refers to, such as compiled checks) is
+    inherited by the workers when they fork, and does not need to be.
+    Otherwise, or if the address space cannot be reopened in a worker,
+    the calls are made in this process as each result is consumed.
+    """
+    global _worker_function
+
+    workers = config.SCAN_WORKERS or 1
+    if workers > 1:
+        blocks = list(blocks)
+
+    pickled_address_space = None
+    if workers > 1 and len(blocks) > 1 and hasattr(os, "fork"):
+        try:
+            pickled_address_space = pickle.dumps(address_space)
+        except (pickle.PickleError, TypeError), e:
+            debug.warning("Unable to scan {0} in parallel: {1}".format(address_space.__class__.__name__, e))
+
+    if pickled_address_space is None:
+        for block_offset, block_length in blocks:
+            yield function(address_space, block_offset, block_length)
+        return
+
+    _worker_function = function
+    pool = multiprocessing.Pool(min(workers, len(blocks)), _init_worker, (pickled_address_space,))
+    try:
+        for result in pool.imap(_run_worker, blocks):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        _worker_function = None
+
+########### Needle engines locate every occurrence of a set of literal
+########### strings within a block in a single pass, so that the
+########### scanner only needs to run its checks on the candidates.
+
+class NeedleEngine(object):
+    """ Base class for needle engines.
+
+    A needle engine is constructed with a list of literal strings and
+    produces the sorted offsets within a buffer at which any of them
+    start.
+    """
+    def __init__(self, needles):
+        self.needles = sorted(set(needles))
+        if not self.needles or not min([len(n) for n in self.needles]):
+            raise ValueError("Needle engines require at least one non-empty needle")
+
+    def find_all(self, data, end = None):
+        """ A generator of the sorted offsets in data (before end)
+            where one of the needles begins """
+        raise NotImplementedError("This is an abstract method and should not be referenced directly")
+
+class FindNeedleEngine(NeedleEngine):
+    """ Finds a single needle using str.find """
+    def __init__(self, needles):
+        NeedleEngine.__init__(self, needles)
+        if len(self.needles) != 1:
+            raise ValueError("FindNeedleEngine only supports a single needle")
+        self.needle = self.needles[0]
+
+    def find_all(self, data, end = None):
+        if end is None:
+            end = len(data)
+        offset = data.find(self.needle, 0, end + len(self.needle) - 1)
+        while offset >= 0:
+            yield offset
+            offset = data.find(self.needle, offset + 1, end + len(self.needle) - 1)
+
+class RegexNeedleEngine(NeedleEngine):
+    """ Finds several needles with a single compiled regular expression """
+    def __init__(self, needles):
+        NeedleEngine.__init__(self, needles)
+        # The lookahead makes each match zero length, so overlapping
+        # needles (and needles that are prefixes of each other) are all found
+        self.regex = re.compile("(?=" + "|".join([re.escape(n) for n in self.needles]) + ")", re.S)
+
+    def find_all(self, data, end = None):
+        if end is None:
+            end = len(data)
+        # Don't pass end as endpos, since the lookahead must still be able
+        # to see needles that start before end but finish after it
+        for match in self.regex.finditer(data):
+            if match.start() >= end:
+                break
+            yield match.start()
+
+class AhoCorasickNeedleEngine(NeedleEngine):
+    """ Finds large sets of needles using an Aho-Corasick automaton """
+    def __init__(self, needles):
+        NeedleEngine.__init__(self, needles)
+        if not has_ahocorasick:
+            raise ValueError("The ahocorasick module is not installed")
+        self.automaton = ahocorasick.Automaton()
+        for needle in self.needles:
+            self.automaton.add_word(needle, len(needle))
+        self.automaton.make_automaton()
+
+    def find_all(self, data, end = None):
+        if end is None:
+            end = len(data)
+        # Matches are reported by their last byte, so restore the start order
+        hits = set()
+        for last, length in self.automaton.iter(data):
+            start = last - length + 1
+            if start < end:
+                hits.add(start)
+        for offset in sorted(hits):
+            yield offset
+
+## Above this many needles an automaton beats a regex alternation
+AHOCORASICK_THRESHOLD = 32
+
+def get_needle_engine(needles):
+    """ Returns the most appropriate needle engine for a set of needles """
+    needles = set(needles)
+    if len(needles) == 1:
+        return FindNeedleEngine(needles)
+    if has_ahocorasick and len(needles) > AHOCORASICK_THRESHOLD:
+        return AhoCorasickNeedleEngine(needles)
+    return RegexNeedleEngine(needles)
+
 ########### Following is the new implementation of the scanning
 ########### framework. The old framework was based on PyFlag's
 ########### scanning framework which is probably too complex for this.
@@ -46,10 +208,16 @@ import volatility.conf as conf
 class BaseScanner(object):
     """ A more thorough scanner which checks every byte """
     checks = []
+    ## The NeedleEngine class used to locate candidates, or None to
+    ## pick one based on the number of needles
+    needle_engine = None
+
     def __init__(self, window_size = 8):
         self.buffer = addrspace.BufferAddressSpace(conf.DummyConfig(), data = '\x00' * 1024)
         self.window_size = window_size
         self.constraints = []
+        self.skippers = []
+        self.engine = None
 
         self.error_count = 0
 
@@ -78,20 +246,46 @@ class BaseScanner(object):
 
         return True
 
-    overlap = 20
-    def scan(self, address_space, offset = 0, maxlen = None):
-        self.buffer.profile = address_space.profile
-        current_offset = offset
+    def get_needle_engine(self):
+        """ Returns a needle engine for the first constraint that declares
+        needles, or None if no constraint does.
 
-        ## Build our constraints from the specified ScannerCheck
-        ## classes:
+        Candidates can only be restricted to needle hits if every
+        constraint must match, otherwise the check with the needles may
+        be one of the permitted failures.
+        """
+        if self.error_count:
+            return None
+        for check in self.constraints:
+            needles = check.get_needles()
+            if needles:
+                if self.needle_engine:
+                    return self.needle_engine(needles)
+                return get_needle_engine(needles)
+        return None
+
+    def build_constraints(self):
+        """ Builds our constraints from the specified ScannerCheck
+        classes, along with the skippers and needle engine used to
+        find candidates for them """
         self.constraints = []
         for class_name, args in self.checks:
             check = registry.get_plugin_classes(ScannerCheck)[class_name](self.buffer, **args)
             self.constraints.append(check)
 
         ## Which checks also have skippers?
-        skippers = [ c for c in self.constraints if hasattr(c, "skip") ]
+        self.skippers = [ c for c in self.constraints if hasattr(c, "skip") ]
+
+        ## Can the candidates be found with a single pass over each block?
+        self.engine = self.get_needle_engine()
+
+    overlap = 20
+    def get_blocks(self, address_space, offset = 0, maxlen = None):
+        """ A generator of (block_offset, block_length) covering the
+        available addresses of address_space, where each block extends
+        self.overlap bytes into the next one.
+        """
+        current_offset = offset
 
         for (range_start, range_size) in sorted(address_space.get_available_addresses()):
             # Jump to the next available point to scan from
@@ -109,39 +303,68 @@ class BaseScanner(object):
                 # Figure out how much data to read
                 l = min(constants.SCAN_BLOCKSIZE + self.overlap, range_end - current_offset)
 
-                # Populate the buffer with data
-                # We use zread to scan what we can because there are often invalid
-                # pages in the DTB
-                data = address_space.zread(current_offset, l)
-                self.buffer.assign_buffer(data, current_offset)
-
-                ## Run checks throughout this block of data
-                i = 0
-                while i < l:
-                    if self.check_addr(i + current_offset):
-                        ## yield the offset to the start of the memory
-                        ## (after the pool tag)
-                        yield i + current_offset
-
-                    ## Where should we go next? By default we go 1 byte
-                    ## ahead, but if some of the checkers have skippers,
-                    ## we may actually go much farther. Checkers with
-                    ## skippers basically tell us that there is no way
-                    ## they can match anything before the skipped result,
-                    ## so there is no point in trying them on all the data
-                    ## in between. This optimization is useful to really
-                    ## speed things up. FIXME - currently skippers assume
-                    ## that the check must match, therefore we can skip
-                    ## the unmatchable region, but its possible that a
-                    ## scanner needs to match only some checkers.
-                    skip = 1
-                    for s in skippers:
-                        skip = max(skip, s.skip(data, i))
-
-                    i += skip
+                yield current_offset, l
 
                 current_offset += min(constants.SCAN_BLOCKSIZE, l)
 
+    def scan_block_at(self, address_space, current_offset, l):
+        """ Reads a block into self.buffer and returns a list of the
+        offsets within it that satisfy our constraints """
+        # Populate the buffer with data
+        # We use zread to scan what we can because there are often invalid
+        # pages in the DTB
+        data = address_space.zread(current_offset, l)
+        self.buffer.assign_buffer(data, current_offset)
+
+        return list(self.scan_block(data, current_offset, l))
+
+    def scan_block(self, data, current_offset, l):
+        """ A generator of the offsets within a block that satisfy our
+        constraints. The block must already be loaded into self.buffer.
+        """
+        if self.engine:
+            ## Only check the offsets where a needle starts. Hits in
+            ## the overlap are left for the next block, which
+            ## starts there, so they are not reported twice.
+            for i in self.engine.find_all(data, min(constants.SCAN_BLOCKSIZE, l)):
+                if self.check_addr(i + current_offset):
+                    yield i + current_offset
+            return
+
+        ## Run checks throughout this block of data
+        i = 0
+        while i < l:
+            if self.check_addr(i + current_offset):
+                ## yield the offset to the start of the memory
+                ## (after the pool tag)
+                yield i + current_offset
+
+            ## Where should we go next? By default we go 1 byte
+            ## ahead, but if some of the checkers have skippers,
+            ## we may actually go much farther. Checkers with
+            ## skippers basically tell us that there is no way
+            ## they can match anything before the skipped result,
+            ## so there is no point in trying them on all the data
+            ## in between. This optimization is useful to really
+            ## speed things up. FIXME - currently skippers assume
+            ## that the check must match, therefore we can skip
+            ## the unmatchable region, but its possible that a
+            ## scanner needs to match only some checkers.
+            skip = 1
+            for s in self.skippers:
+                skip = max(skip, s.skip(data, i))
+
+            i += skip
+
+    def scan(self, address_space, offset = 0, maxlen = None):
+        self.buffer.profile = address_space.profile
+        self.build_constraints()
+
+        blocks = self.get_blocks(address_space, offset, maxlen)
+        for hits in map_blocks(self.scan_block_at, address_space, blocks):
+            for hit in hits:
+                yield hit
+
 class DiscontigScanner(BaseScanner):
     def scan(self, address_space, offset = 0, maxlen = None):
         debug.warning("DiscontigScanner has been deprecated, all functionality is now contained in BaseScanner")
@@ -165,6 +388,16 @@ class ScannerCheck(object):
     def check(self, _offset):
         return False
 
+    def get_needles(self):
+        """ Returns a list of literal strings, one of which must start at
+        any offset this check can match, or an empty list if the check
+        cannot be expressed that way.
+
+        When a constraint provides needles the scanner finds them all in
+        one pass over each block and only calls check() on those offsets.
+        """
+        return []
+
     ## If you want to speed up the scanning define this method - it
     ## will be used to skip the data which is obviously not going to
     ## match. You will need to return the number of bytes from offset
@@ -220,3 +453,60 @@ class PoolScanner(BaseScanner):
     def scan(self, address_space, offset = 0, maxlen = None):
         for i in BaseScanner.scan(self, address_space, offset, maxlen):
             yield self.object_offset(i, address_space)
+
+class FusedPoolScanner(BaseScanner):
+    """ Runs several PoolScanners over an address space in a single pass.
+
+    Each block of the address space is read once and every scanner's
+    constraints are run against it, so scanning for N kinds of pool
+    allocation costs one pass over the image rather than N.
+
+    Results are yielded as (scanner_name, offset) tuples in offset
+    order, where scanner_name is the class name of the PoolScanner that
+    matched and offset is the value of its object_offset().
+    """
+    def __init__(self, scanners, window_size = 8):
+        """ scanners is an iterable of PoolScanner classes (which must be
+        constructable without arguments) or PoolScanner instances """
+        BaseScanner.__init__(self, window_size)
+        self.scanners = []
+        for scanner in scanners:
+            if isinstance(scanner, type):
+                scanner = scanner()
+            self.scanners.append(scanner)
+
+        names = [ s.__class__.__name__ for s in self.scanners ]
+        if len(set(names)) != len(names):
+            raise ValueError("FusedPoolScanner requires each scanner to be of a different class")
+
+        ## Every block is read by us, so it must overlap enough for all of them
+        self.overlap = max([self.overlap] + [ s.overlap for s in self.scanners ])
+
+    def scan(self, address_space, offset = 0, maxlen = None):
+        self.buffer.profile = address_space.profile
+
+        ## The scanners all share our buffer, so their checks see each block
+        for scanner in self.scanners:
+            scanner.buffer = self.buffer
+            scanner.build_constraints()
+
+        scanners = dict((s.__class__.__name__, s) for s in self.scanners)
+
+        blocks = self.get_blocks(address_space, offset, maxlen)
+        for hits in map_blocks(self.scan_block_at, address_space, blocks):
+            for hit, name in hits:
+                yield name, scanners[name].object_offset(hit, address_space)
+
+    def scan_block_at(self, address_space, current_offset, l):
+        """ Reads a block and returns a sorted list of (offset, scanner_name)
+        for the hits of every scanner within it """
+        data = address_space.zread(current_offset, l)
+        self.buffer.assign_buffer(data, current_offset)
+
+        hits = []
+        for scanner in self.scanners:
+            name = scanner.__class__.__name__
+            for hit in scanner.scan_block(data, current_offset, l):
+                hits.append((hit, name))
+
+        return sorted(hits)
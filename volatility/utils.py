@@ -24,6 +24,7 @@ import volatility.exceptions as exceptions
 import volatility.registry as registry
 import volatility.addrspace as addrspace
 import volatility.debug as debug
+import volatility.plugins.addrspaces.pagecache as pagecache
 import socket
 import itertools
 
@@ -35,6 +36,12 @@ def load_as(config, astype = 'virtual', **kwargs):
     base_as = None
     error = exceptions.AddrSpaceError()
 
+    ## The page cache goes on top of the physical layer, below any virtual
+    ## address space that gets stacked on it.  It is left out of the
+    ## registry's classes, so it never takes part in the voting itself
+    page_cache = pagecache.PageCacheAddressSpace
+    cached_as = {}
+
     # Start off requiring another round    
     found = True
     ## A full iteration through all the classes without anyone
@@ -45,8 +52,14 @@ def load_as(config, astype = 'virtual', **kwargs):
         for cls in sorted(registry.get_plugin_classes(addrspace.BaseAddressSpace).values(),
                           key = lambda x: x.order if hasattr(x, 'order') else 10):
             debug.debug("Trying {0} ".format(cls))
+            base = base_as
+            if issubclass(cls, addrspace.AbstractVirtualAddressSpace) and \
+                    not isinstance(base_as, addrspace.AbstractVirtualAddressSpace):
+                if id(base_as) not in cached_as:
+                    cached_as[id(base_as)] = page_cache.wrap(base_as, config)
+                base = cached_as[id(base_as)]
             try:
-                base_as = cls(base_as, config, astype = astype, **kwargs)
+                base_as = cls(base, config, astype = astype, **kwargs)
                 debug.debug("Succeeded instantiating {0}".format(base_as))
                 found = True
                 break
@@ -65,6 +78,9 @@ def load_as(config, astype = 'virtual', **kwargs):
     if base_as is None:
         raise error
 
+    if not isinstance(base_as, addrspace.AbstractVirtualAddressSpace):
+        base_as = cached_as.get(id(base_as)) or page_cache.wrap(base_as, config)
+
     return base_as
 
 def Hexdump(data, width = 16):
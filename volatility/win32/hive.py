@@ -43,6 +43,7 @@ CI_OFF_MASK = 0x0FFF
 CI_OFF_SHIFT = 0x0
 
 BLOCK_SIZE = 0x1000
+BLOCKS_PER_TABLE = 512
 
 class HiveAddressSpace(addrspace.BaseAddressSpace):
     def __init__(self, base, config, hive_addr, **kwargs):
@@ -51,6 +52,10 @@ class HiveAddressSpace(addrspace.BaseAddressSpace):
         self.hive = obj.Object("_HHIVE", hive_addr, base)
         self.baseblock = self.hive.BaseBlock.v()
         self.flat = self.hive.Flat.v() > 0
+        # The BlockAddress of every block, by storage type, see block_map()
+        self.block_maps = [None, None]
+        # Keys already found by rawreg.open_key, by root and path
+        self.key_paths = {}
 
     def __getstate__(self):
         result = addrspace.BaseAddressSpace.__getstate__(self)
@@ -58,6 +63,57 @@ class HiveAddressSpace(addrspace.BaseAddressSpace):
 
         return result
 
+    def block_map(self, ci_type):
+        """Returns a list of the BlockAddress of each block of the given 
+        storage type (stable or volatile), indexed by the table and block
+        bits of a cell index, with None for blocks that can't be read.
+
+        The map is read from the hive's directory and tables the first 
+        time it is needed, reading each table in one go.  Call 
+        refresh_block_maps if the hive may have grown since.
+        """
+        blocks = self.block_maps[ci_type]
+        if blocks is not None:
+            return blocks
+
+        blocks = []
+        storage = self.hive.Storage[ci_type]
+        length = storage.Length.v()
+        count = min(int(length or 0), CI_TABLE_MASK | CI_BLOCK_MASK) / BLOCK_SIZE
+        tables = (count + BLOCKS_PER_TABLE - 1) / BLOCKS_PER_TABLE
+
+        directory = storage.Map.Directory
+        if tables and directory != None:
+            profile = self.base.profile
+            entry_size = profile.get_obj_size("_HMAP_ENTRY")
+            field_offset = profile.get_obj_offset("_HMAP_ENTRY", "BlockAddress")
+            native_type = profile.vtypes["_HMAP_ENTRY"][1]["BlockAddress"][1][0]
+            field = struct.Struct(profile.native_types[native_type][1])
+
+            for ci_table in range(tables):
+                n = min(BLOCKS_PER_TABLE, count - ci_table * BLOCKS_PER_TABLE)
+                table = directory[ci_table].v()
+                data = table and self.base.read(table, n * entry_size)
+                if data and len(data) == n * entry_size:
+                    blocks.extend(field.unpack_from(data, i * entry_size + field_offset)[0]
+                                  for i in range(n))
+                    continue
+
+                # Fall back to reading each entry
+                for i in range(n):
+                    data = table and self.base.read(table + i * entry_size + field_offset, field.size)
+                    if data and len(data) == field.size:
+                        blocks.append(field.unpack(data)[0])
+                    else:
+                        blocks.append(None)
+
+        self.block_maps[ci_type] = blocks
+        return blocks
+
+    def refresh_block_maps(self):
+        """Discards the block maps, so they are read again when needed"""
+        self.block_maps = [None, None]
+
     def vtop(self, vaddr):
         # If the hive is listed as "flat", it is all contiguous in memory
         # so we can just calculate it relative to the base block.
@@ -65,9 +121,23 @@ class HiveAddressSpace(addrspace.BaseAddressSpace):
             return self.baseblock + vaddr + BLOCK_SIZE + 4
 
         ci_type = (vaddr & CI_TYPE_MASK) >> CI_TYPE_SHIFT
+        index = (vaddr & (CI_TABLE_MASK | CI_BLOCK_MASK)) >> CI_BLOCK_SHIFT
+        ci_off = (vaddr & CI_OFF_MASK) >> CI_OFF_SHIFT
+
+        blocks = self.block_maps[ci_type]
+        if blocks is None:
+            blocks = self.block_map(ci_type)
+
+        if index < len(blocks):
+            block = blocks[index]
+            if block is None:
+                return obj.NoneObject("Block {0:#x} of hive {1:#x} is not readable",
+                                      reason_args = (index, self.hive.obj_offset))
+            return block + ci_off + 4
+
+        # Outside the map, look the block up directly 
         ci_table = (vaddr & CI_TABLE_MASK) >> CI_TABLE_SHIFT
         ci_block = (vaddr & CI_BLOCK_MASK) >> CI_BLOCK_SHIFT
-        ci_off = (vaddr & CI_OFF_MASK) >> CI_OFF_SHIFT
 
         block = self.hive.Storage[ci_type].Map.Directory[ci_table].Table[ci_block].BlockAddress
 
@@ -95,56 +165,52 @@ class HiveAddressSpace(addrspace.BaseAddressSpace):
     def read(self, vaddr, length, zero = False):
         length = int(length)
         vaddr = int(vaddr)
-        first_block = BLOCK_SIZE - vaddr % BLOCK_SIZE
-        full_blocks = ((length + (vaddr % BLOCK_SIZE)) / BLOCK_SIZE) - 1
-        left_over = (length + vaddr) % BLOCK_SIZE
 
-        paddr = self.vtop(vaddr)
-        if paddr == None and zero:
-            if length < first_block:
-                return "\0" * length
+        # Translate each block first, merging blocks that are contiguous
+        # in the base address space (always the case for flat hives) into
+        # runs of [paddr, length, [block lengths]]
+        runs = []
+        position = vaddr
+        end = vaddr + length
+        while position < end:
+            datalen = min(end - position, BLOCK_SIZE - position % BLOCK_SIZE)
+            paddr = self.vtop(position)
+            if paddr == None:
+                if not zero:
+                    return None
+                paddr = None
             else:
-                stuff_read = "\0" * first_block
-        elif paddr == None:
-            return None
-        else:
-            if length < first_block:
-                stuff_read = self.base.read(paddr, length)
-                if not stuff_read and zero:
-                    return "\0" * length
-                else:
-                    return stuff_read
-
-            stuff_read = self.base.read(paddr, first_block)
-            if not stuff_read and zero:
-                stuff_read = "\0" * first_block
+                paddr = int(paddr)
 
-        new_vaddr = vaddr + first_block
-        for _i in range(0, full_blocks):
-            paddr = self.vtop(new_vaddr)
-            if paddr == None and zero:
-                stuff_read = stuff_read + "\0" * BLOCK_SIZE
-            elif paddr == None:
-                return None
+            if runs and paddr != None and runs[-1][0] != None and runs[-1][0] + runs[-1][1] == paddr:
+                runs[-1][1] += datalen
+                runs[-1][2].append(datalen)
             else:
-                new_stuff = self.base.read(paddr, BLOCK_SIZE)
+                runs.append([paddr, datalen, [datalen]])
+            position += datalen
+
+        stuff_read = []
+        for paddr, runlen, datalens in runs:
+            if paddr == None:
+                stuff_read.append("\0" * runlen)
+                continue
+
+            new_stuff = self.base.read(paddr, runlen)
+            if new_stuff and len(new_stuff) == runlen:
+                stuff_read.append(new_stuff)
+                continue
+
+            # Fall back to reading the run one block at a time
+            for datalen in datalens:
+                new_stuff = self.base.read(paddr, datalen)
                 if not new_stuff and zero:
-                    new_stuff = "\0" * BLOCK_SIZE
+                    new_stuff = "\0" * datalen
                 elif not new_stuff:
                     return None
-                else:
-                    stuff_read = stuff_read + new_stuff
-            new_vaddr = new_vaddr + BLOCK_SIZE
+                stuff_read.append(new_stuff)
+                paddr += datalen
 
-        if left_over > 0:
-            paddr = self.vtop(new_vaddr)
-            if paddr == None and zero:
-                stuff_read = stuff_read + "\0" * left_over
-            elif paddr == None:
-                return None
-            else:
-                stuff_read = stuff_read + self.base.read(paddr, left_over)
-        return stuff_read
+        return "".join(stuff_read)
 
     def zread(self, addr, length):
         return self.read(addr, length, True)
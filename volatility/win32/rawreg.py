@@ -76,18 +76,116 @@ def get_root(address_space, stable = True):
         return obj.Object("_CM_KEY_NODE", ROOT_INDEX | 0x80000000, address_space)
 
 def open_key(root, key):
-    if key == []:
-        return root
-
-    if not root.is_valid():
-        return None
-
-    keyname = key.pop(0)
-    for s in subkeys(root):
-        if s.Name.upper() == keyname.upper():
-            return open_key(s, key)
-    debug.debug("Couldn't find subkey {0} of {1}".format(keyname, root.Name), 1)
-    return obj.NoneObject("Couldn't find subkey {0} of {1}".format(keyname, root.Name))
+    """Follows the list of subkey names in key down from root, returning 
+    the key found, a NoneObject if a subkey is missing or None if a key 
+    along the way is invalid.
+
+    Keys found are remembered by the hive address space (in key_paths, if
+    it has one), so looking the same path up again costs nothing.
+    """
+    paths = getattr(root.obj_vm, "key_paths", None)
+    path = (root.obj_offset,)
+
+    for keyname in key:
+        if not root.is_valid():
+            return None
+
+        path += (keyname.upper(),)
+        if paths is not None and path in paths:
+            found = paths[path]
+        else:
+            found = find_subkey(root, keyname)
+            if found is None:
+                debug.debug("Couldn't find subkey {0} of {1}".format(keyname, root.Name), 1)
+                found = obj.NoneObject("Couldn't find subkey {0} of {1}".format(keyname, root.Name))
+            if paths is not None:
+                paths[path] = found
+
+        if isinstance(found, obj.NoneObject):
+            return found
+        root = found
+
+    return root
+
+def name_hash(name):
+    """Returns the hash that an LH subkey list keeps for a key name"""
+    result = 0
+    for c in name.upper():
+        result = (result * 37 + ord(c)) & 0xFFFFFFFF
+    return result
+
+def find_subkey(key, name):
+    """Returns the first subkey of key whose name matches name (ignoring
+    case), or None.
+
+    LH and LF lists keep a hash or the first four characters of each name
+    next to the subkey's cell, so only the subkeys whose hash or hint
+    matches are read.  Names which aren't plain ASCII may be hashed
+    differently by Windows, so for those every subkey is checked.
+    """
+    upper = name.upper()
+    if all(ord(c) < 0x80 for c in name):
+        candidates = hashed_subkeys(key, upper)
+    else:
+        candidates = subkeys(key)
+
+    for s in candidates:
+        if s.Name.upper() == upper:
+            return s
+    return None
+
+def read_hashed_sklist(sk, upper):
+    """Yields the subkeys in the list sk which may be called upper, 
+    judging by their hashes (LH) or hints (LF).  The sub lists of RI 
+    lists are searched in turn."""
+    sig = sk.Signature.v()
+    if sig == LH_SIG or sig == LF_SIG:
+        count = sk.Count.v()
+        data = sk.obj_vm.read(sk.List.obj_offset, count * 8)
+        if not data or len(data) != count * 8:
+            # Fall back to the list as read_sklist sees it
+            for i in read_sklist(sk):
+                yield i
+            return
+
+        if sig == LH_SIG:
+            wanted = struct.pack("<I", name_hash(upper))
+            matches = lambda hint: hint == wanted
+        else:
+            wanted = upper[:4].ljust(4, "\0")
+            matches = lambda hint: hint.upper() == wanted
+
+        for i in range(count):
+            if matches(data[i * 8 + 4:i * 8 + 8]):
+                cell = struct.unpack("<I", data[i * 8:i * 8 + 4])[0]
+                yield obj.Object("_CM_KEY_NODE", cell, sk.obj_vm)
+
+    elif sig == RI_SIG:
+        for i in range(sk.Count):
+            ptr_off = sk.List.obj_offset + (i * 4)
+            if not sk.obj_vm.is_valid_address(ptr_off):
+                continue
+            ssk_off = obj.Object("unsigned int", ptr_off, sk.obj_vm)
+            if not sk.obj_vm.is_valid_address(ssk_off):
+                continue
+
+            ssk = obj.Object("_CM_KEY_INDEX", ssk_off, sk.obj_vm)
+            for i in read_hashed_sklist(ssk, upper):
+                yield i
+
+def hashed_subkeys(key, upper):
+    """Like subkeys, but only yields the subkeys that may be called upper"""
+    if not key.is_valid():
+        return
+
+    for storage in range(2):
+        if int(key.SubKeyCounts[storage]) > 0:
+            sk = obj.Object("_CM_KEY_INDEX", key.SubKeyLists[storage], key.obj_vm)
+            if not sk or not sk.is_valid():
+                continue
+            for i in read_hashed_sklist(sk, upper):
+                if i and i.Signature.v() == NK_SIG:
+                    yield i
 
 def read_sklist(sk):
     if (sk.Signature.v() == LH_SIG or
@@ -0,0 +1,186 @@
+# Volatility
+# Copyright (c) 2008-2013 Volatility Foundation
+#
+# This file is part of Volatility.
+#
+# Volatility is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License Version 2 as
+# published by the Free Software Foundation.  You may not use, modify or
+# distribute this program under any other version of the GNU General
+# Public License.
+#
+# Volatility is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Volatility.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+An index of the registry hives of an image and their keys, kept in
+the cache directory so that registry plugins can share it.
+"""
+
+import volatility.win32.rawreg as rawreg
+import volatility.obj as obj
+import volatility.cache as cache
+import volatility.addrspace as addrspace
+import cPickle as pickle
+import struct
+import zlib
+
+def hive_name(hive):
+    """Returns the name of a _CMHIVE"""
+    try:
+        return hive.FileFullPath.v() or hive.FileUserName.v() or hive.HiveRootPath.v() or "[no name]"
+    except AttributeError:
+        return "[no name]"
+
+def key_cell(key):
+    """Returns the cell index of a key returned by rawreg.subkeys,
+    which may be the pointer to it"""
+    if isinstance(key, obj.Pointer):
+        return key.v() & 0xFFFFFFFF
+    return key.obj_offset & 0xFFFFFFFF
+
+class HiveIndex(object):
+    """The keys of a hive, as saved by RegistryIndex.
+
+    Each row is (parent row, name, cell, LastWriteTime, values), in the
+    order reg_get_all_keys walks the hive, where values lists the name,
+    type and data length of each of the key's values.
+    """
+
+    def __init__(self, config, rows):
+        self.rows = rows
+        self.names = []
+        self.depths = []
+        self.paths = {}
+        self.cells = {}
+
+        paths = []
+        for i, (parent, name, cell, _lastwrite, _values) in enumerate(rows):
+            if parent < 0:
+                self.names.append(name)
+                self.depths.append(0)
+                paths.append(())
+            else:
+                self.names.append(self.names[parent] + "\\" + name)
+                self.depths.append(self.depths[parent] + 1)
+                paths.append(paths[parent] + (name.upper(),))
+            self.paths.setdefault(paths[i], i)
+            self.cells.setdefault(cell, i)
+
+        ## The times are read back through WinTimeStamps, so they print
+        ## just as they would from the hive
+        data = struct.pack("<{0}q".format(len(rows)), *[r[3] for r in rows])
+        self.times = addrspace.BufferAddressSpace(config, data = data)
+
+    @staticmethod
+    def build_rows(root):
+        """Walks the hive down from root, returning its rows"""
+        if not root:
+            return []
+
+        def row(parent, name, key):
+            lastwrite = key.LastWriteTime.as_windows_timestamp()
+            values = tuple((str(v.Name), int(v.Type or 0), int(v.DataLength or 0)) for v in rawreg.values(key))
+            return (parent, str(name), key_cell(key), int(lastwrite or 0), values)
+
+        rows = [row(-1, root.Name, root)]
+        keys = [(0, root)]
+        for parent, k in keys:
+            for s in rawreg.subkeys(k):
+                if parent == 0 or s.Name:
+                    keys.append((len(rows), s))
+                    rows.append(row(parent, s.Name, s))
+        return rows
+
+    def lastwrite(self, row):
+        """Returns the LastWriteTime of a row, as a WinTimeStamp"""
+        return obj.Object("WinTimeStamp", row * 8, self.times, is_utc = True)
+
+    def find_cell(self, key):
+        """Returns the cell of the key at the path key (a list of names)
+        below the root, or None"""
+        row = self.paths.get(tuple(k.upper() for k in key))
+        return row is not None and self.rows[row][2] or None
+
+    def value_names(self, cell):
+        """Returns the names of the values of the key at cell, or None
+        if the key isn't in the index"""
+        row = self.cells.get(cell)
+        if row is None:
+            return None
+        return set(v[0] for v in self.rows[row][4])
+
+class RegistryIndex(object):
+    """An index of an image's hives and their keys.
+
+    When caching is enabled (--cache) the hive offsets and, once a hive
+    has been walked, its keys are kept in the cache directory so that
+    later registry plugins on the same image don't have to scan for the
+    hives or walk them again.  Without caching nothing is saved and the
+    hives are walked as usual.
+    """
+
+    def __init__(self, config):
+        self._config = config
+        self.enabled = bool(config.CACHE)
+        self.hive_indexes = {}
+
+    def hives(self, calculate):
+        """Returns a list of (offset, name) of each hive, from the cache
+        or else from the _CMHIVEs yielded by calculate()"""
+        node = cache.CACHE["registry/hives"]
+        hives = node and node.get_payload()
+        if hives is None:
+            hives = []
+            seen = set()
+            for hive in calculate():
+                if hive.obj_offset not in seen:
+                    seen.add(hive.obj_offset)
+                    hives.append((hive.obj_offset, hive_name(hive)))
+            if node:
+                node.set_payload(hives)
+                node.dump()
+        return hives
+
+    def keys(self, offset, h = None):
+        """Returns the HiveIndex of the hive at offset, from the cache or,
+        if h (its HiveAddressSpace) is given, by walking it.  Returns None
+        if caching is disabled or the hive hasn't been indexed."""
+        if not self.enabled:
+            return None
+        if offset in self.hive_indexes:
+            return self.hive_indexes[offset]
+
+        node = cache.CACHE["registry/keys/{0:x}".format(offset)]
+        data = node and node.get_payload()
+        if data:
+            rows = pickle.loads(zlib.decompress(data))
+        elif h is not None:
+            rows = HiveIndex.build_rows(rawreg.get_root(h))
+            if node:
+                node.set_payload(zlib.compress(pickle.dumps(rows, 2)))
+                node.dump()
+        else:
+            return None
+
+        index = self.hive_indexes[offset] = HiveIndex(self._config, rows)
+        return index
+
+    def all_keys(self, hives, get_hive):
+        """Yields (LastWriteTime, hive name, key name) for every key of
+        the hives (a dict of offset to name) in the order reg_get_all_keys
+        walks them: each level of every hive in turn"""
+        entries = []
+        for offset in hives:
+            index = self.keys(offset, get_hive(offset))
+            entries.extend((depth, row, hives[offset], index) for row, depth in enumerate(index.depths))
+        entries.sort(key = lambda e: e[0])
+
+        for _depth, row, reg_name, index in entries:
+            yield index.lastwrite(row), reg_name, index.names[row]
@@ -32,31 +32,31 @@
 
 #pylint: disable-msg=C0111
 
-from struct import unpack
-from struct import error as StructError
-
-def recombine(outbuf):
-    return "".join(outbuf[k] for k in sorted(outbuf.keys()))
-
 def xpress_decode(inputBuffer):
-    outputBuffer = {}
-    outputIndex = 0
+    """Decodes a buffer of plain LZ77 (xpress) compressed data.
+
+    The output is built in a bytearray, and back references are copied
+    with slices rather than a byte at a time. Decoding stops quietly,
+    returning what has been decoded so far, if the input is truncated or
+    refers back beyond the start of the output.
+    """
+    inputBuffer = bytearray(inputBuffer)
+    inputLength = len(inputBuffer)
+    outputBuffer = bytearray()
     inputIndex = 0
+    indicator = 0
     indicatorBit = 0
     nibbleIndex = 0
 
     # we are decoding the entire input here, so I have changed
     # the check to see if we're at the end of the output buffer
     # with a check to see if we still have any input left.
-    while inputIndex < len(inputBuffer):
+    while inputIndex < inputLength:
         if (indicatorBit == 0):
-            # in pseudocode this was indicatorBit = ..., but that makes no
-            # sense, so I think this was intended...
-            try:
-                indicator = unpack("<L", inputBuffer[inputIndex:inputIndex + 4])[0]
-            except StructError:
-                return recombine(outputBuffer)
-
+            if inputIndex + 4 > inputLength:
+                break
+            indicator = (inputBuffer[inputIndex] | (inputBuffer[inputIndex + 1] << 8) |
+                         (inputBuffer[inputIndex + 2] << 16) | (inputBuffer[inputIndex + 3] << 24))
             inputIndex += 4
             indicatorBit = 32
 
@@ -65,13 +65,17 @@ def xpress_decode(inputBuffer):
         # set in indicator. For example, if indicatorBit has value 4 
         # check whether the 4th bit of the value in indicator is set
         if not (indicator & (1 << indicatorBit)):
-            try:
-                outputBuffer[outputIndex] = inputBuffer[inputIndex]
-            except IndexError:
-                return recombine(outputBuffer)
-
-            inputIndex += 1
-            outputIndex += 1
+            # Copy the whole run of literals up to the next set bit
+            # (or the end of the indicator) in one go
+            count = 1
+            while count <= indicatorBit and not (indicator & (1 << (indicatorBit - count))):
+                count += 1
+            if inputIndex + count > inputLength:
+                outputBuffer += inputBuffer[inputIndex:]
+                break
+            outputBuffer += inputBuffer[inputIndex:inputIndex + count]
+            inputIndex += count
+            indicatorBit -= count - 1
         else:
             # Get the length. This appears to use a scheme whereby if
             # the value at the current width is all ones, then we assume
@@ -82,50 +86,56 @@ def xpress_decode(inputBuffer):
             # byte used as a length nibble.
             # Thus if a nibble byte is F2, we would first use the low part (2),
             # and then at some later point get the nibble from the high part (F).
-
-            try:
-                length = unpack("<H", inputBuffer[inputIndex:inputIndex + 2])[0]
-            except StructError:
-                return recombine(outputBuffer)
+            if inputIndex + 2 > inputLength:
+                break
+            length = inputBuffer[inputIndex] | (inputBuffer[inputIndex + 1] << 8)
 
             inputIndex += 2
-            offset = length / 8
-            length = length % 8
+            offset = length >> 3
+            length = length & 7
             if length == 7:
                 if nibbleIndex == 0:
+                    if inputIndex >= inputLength:
+                        break
                     nibbleIndex = inputIndex
-                    length = ord(inputBuffer[inputIndex]) % 16
+                    length = inputBuffer[inputIndex] & 15
                     inputIndex += 1
                 else:
                     # get the high nibble of the last place a nibble sized
                     # length was used thus we don't waste that extra half
                     # byte :p
-                    length = ord(inputBuffer[nibbleIndex]) / 16
+                    length = inputBuffer[nibbleIndex] >> 4
                     nibbleIndex = 0
 
                 if length == 15:
-                    length = ord(inputBuffer[inputIndex])
+                    if inputIndex >= inputLength:
+                        break
+                    length = inputBuffer[inputIndex]
                     inputIndex += 1
                     if length == 255:
-                        try:
-                            length = unpack("<H", inputBuffer[inputIndex:inputIndex + 2])[0]
-                        except StructError:
-                            return recombine(outputBuffer)
+                        if inputIndex + 2 > inputLength:
+                            break
+                        length = inputBuffer[inputIndex] | (inputBuffer[inputIndex + 1] << 8)
                         inputIndex = inputIndex + 2
                         length = length - (15 + 7)
                     length = length + 15
                 length = length + 7
             length = length + 3
 
-            while length != 0:
-                try:
-                    outputBuffer[outputIndex] = outputBuffer[outputIndex - offset - 1]
-                except KeyError:
-                    return recombine(outputBuffer)
-                outputIndex += 1
-                length -= 1
-
-    return recombine(outputBuffer)
+            # The back reference starts offset + 1 bytes before the end
+            distance = offset + 1
+            start = len(outputBuffer) - distance
+            if start < 0:
+                break
+            if distance >= length:
+                outputBuffer += outputBuffer[start:start + length]
+            else:
+                # The source overlaps the bytes being written, so the
+                # last distance bytes repeat to fill the length
+                pattern = outputBuffer[start:]
+                outputBuffer += (pattern * (length // distance + 1))[:length]
+
+    return str(outputBuffer)
 
 try:
     import pyxpress #pylint: disable-msg=F0401